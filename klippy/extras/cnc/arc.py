@@ -1,5 +1,11 @@
 # klippy/extras/cnc/arc.py
+import functools
 import math
+from array import array
+
+# Number of rotation-recurrence steps between exact sin/cos resyncs
+# in segment_arc (bounds floating point drift on long arcs).
+RESYNC_INTERVAL = 256
 
 
 def segment_arc(
@@ -27,7 +33,7 @@ def segment_arc(
     :param center: (x, y) arc center
     :param clockwise: True for G2 (CW), False for G3 (CCW)
     :param tolerance: Maximum allowed chord error for segmentation
-    :return: List of (x, y) points approximating the arc
+    :return: Flat array('d') of x0, y0, x1, y1, ... approximating the arc
     """
 
     # Unpack coordinates for readability
@@ -35,19 +41,21 @@ def segment_arc(
     ex, ey = end
     cx, cy = center
 
+    # Radius vectors from center to start and end
+    vsx = sx - cx
+    vsy = sy - cy
+    vex = ex - cx
+    vey = ey - cy
+
     # Compute radius from center to start and end
     # (Both should be equal for a valid arc)
-    rs = math.hypot(sx - cx, sy - cy)
-    re = math.hypot(ex - cx, ey - cy)
+    rs = math.hypot(vsx, vsy)
+    re = math.hypot(vex, vey)
 
     if rs == 0 or re == 0:
         # Degenerate case: arc radius is zero
         raise ValueError("Arc radius is zero")
 
-    # Compute angular positions of start and end points
-    start_ang = math.atan2(sy - cy, sx - cx)
-    end_ang = math.atan2(ey - cy, ex - cx)
-
     # Detect full-circle arcs (start and end coincide)
     # CNC allows this to indicate a complete revolution
     is_full_circle = (
@@ -57,47 +65,94 @@ def segment_arc(
 
     if is_full_circle:
         # Full circle sweep direction depends only on CW/CCW
-        sweep = -2 * math.pi if clockwise else 2 * math.pi
+        sweep = -math.tau if clockwise else math.tau
     else:
-        # Partial arc: compute signed sweep angle
-        sweep = end_ang - start_ang
+        # Partial arc: signed angle between the radius vectors, taken
+        # from their cross and dot products (no per-point angles needed)
+        sweep = math.atan2(vsx * vey - vsy * vex, vsx * vex + vsy * vey)
 
         # Adjust sweep to match requested direction
         if clockwise and sweep > 0:
-            sweep -= 2 * math.pi
+            sweep -= math.tau
         elif not clockwise and sweep < 0:
-            sweep += 2 * math.pi
+            sweep += math.tau
 
     # Total arc length = radius * angular sweep
     arc_length = abs(sweep) * rs
 
     if arc_length == 0:
         # No movement required
-        return []
+        return array('d')
 
     # Determine segmentation based on chordal tolerance
     #
     # max_seg_angle is the maximum angular step such that
     # the deviation between the arc and straight chord
-    # is within the specified tolerance.
-    max_seg_angle = 2 * math.acos(max(0.0, 1 - tolerance / rs))
+    # is within the specified tolerance:
+    #   2 * acos(1 - tolerance / rs)
+    # For tolerance << rs the small-angle form 2 * sqrt(2 * tolerance / rs)
+    # is used instead; it is slightly smaller, so never under-segments.
+    if tolerance < 0.5 * rs:
+        max_seg_angle = 2.0 * math.sqrt(2.0 * tolerance / rs)
+    else:
+        max_seg_angle = 2 * math.acos(max(0.0, 1 - tolerance / rs))
+
+    if not is_full_circle and abs(sweep) <= max_seg_angle:
+        # A single chord is already within tolerance: go straight to
+        # the exact end point
+        return array('d', (ex, ey))
+
+    # Number of segments needed to respect tolerance (round up so no
+    # segment spans more than max_seg_angle)
+    segments = max(1, math.ceil(abs(sweep) / max_seg_angle))
+
+    return _arc_points(cx, cy, vsx, vsy, rs, sweep / segments, segments)
 
-    # Number of segments needed to respect tolerance
-    segments = max(1, int(abs(sweep) / max_seg_angle))
 
-    points = []
-    for i in range(1, segments + 1):
-        # Interpolate parameter along the arc (0..1)
-        t = i / segments
+def _arc_points(cx, cy, vx, vy, rs, step, segments):
+    """
+    Generate the end points of `segments` equal angular steps around
+    (cx, cy), starting from the radius vector (vx, vy) of length rs.
 
-        # Compute angle for this segment point
-        ang = start_ang + sweep * t
+    The radius vector is advanced by a fixed rotation per segment
+    instead of evaluating sin/cos for every point:
+      (vx, vy) <- (vx*c - vy*s, vx*s + vy*c)
 
-        # Convert polar back to Cartesian coordinates
-        x = cx + rs * math.cos(ang)
-        y = cy + rs * math.sin(ang)
+    Coordinates are stored flat (x, y, x, y, ...) in an array('d') to
+    avoid a tuple and two float objects per point.
 
-        points.append((x, y))
+    Points are produced in blocks of RESYNC_INTERVAL; each later block
+    starts from the exact angle so accumulated rounding stays bounded
+    without a per-point check.
+    """
+    cos = math.cos
+    sin = math.sin
+    c = cos(step)
+    s = sin(step)
+
+    points = array('d')
+    append = points.append
+
+    vx0, vy0 = vx, vy
+
+    # Start angle, only needed for arcs longer than one block
+    start_ang = None
+    i = 0
+    while i < segments:
+        if i:
+            # Exact radius vector at the start of this block
+            if start_ang is None:
+                start_ang = math.atan2(vy0, vx0)
+            ang = start_ang + step * i
+            vx = rs * cos(ang)
+            vy = rs * sin(ang)
+
+        n = min(RESYNC_INTERVAL, segments - i)
+        for _ in range(n):
+            vx, vy = vx * c - vy * s, vx * s + vy * c
+            append(cx + vx)
+            append(cy + vy)
+        i += n
 
     return points
 
@@ -123,10 +178,20 @@ def compute_arc_center_from_r(start, end, r, clockwise):
     :param clockwise: True for G2, False for G3
     :return: (x, y) center position
     """
+    return _arc_center_from_r(start[0], start[1], end[0], end[1],
+                              r, bool(clockwise))
 
-    x0, y0 = start
-    x1, y1 = end
 
+@functools.lru_cache(maxsize=1024)
+def _arc_center_from_r(x0, y0, x1, y1, r, clockwise):
+    """
+    Memoized body of compute_arc_center_from_r().
+
+    CAM output often repeats the same R arc (e.g. helical passes at the
+    same XY), so results are cached on the exact input values. Inputs
+    are not rounded: near-semicircle arcs are sensitive enough that a
+    quantized key could turn a valid arc into "radius too small".
+    """
     # Vector from start to end
     dx = x1 - x0
     dy = y1 - y0
@@ -143,41 +208,23 @@ def compute_arc_center_from_r(start, end, r, clockwise):
         raise ValueError("Arc radius too small for given endpoints")
 
     # Midpoint of the chord between start and end
-    mx = (x0 + x1) / 2
-    my = (y0 + y1) / 2
+    mx = (x0 + x1) * 0.5
+    my = (y0 + y1) * 0.5
 
     # Distance from chord midpoint to circle center
-    h = math.sqrt(r_abs**2 - (chord_len / 2)**2)
+    half_chord = chord_len * 0.5
+    h = math.sqrt(r_abs * r_abs - half_chord * half_chord)
 
-    # Unit vector perpendicular to the chord
+    # Unit vector perpendicular to the chord (chord rotated +90 degrees)
     nx = -dy / chord_len
     ny = dx / chord_len
 
-    # Two possible circle centers
-    cx1 = mx + nx * h
-    cy1 = my + ny * h
-    cx2 = mx - nx * h
-    cy2 = my - ny * h
-
-    # Determine arc direction using cross product sign
-    def is_clockwise(cx, cy):
-        """
-        Determine whether the arc from start to end around
-        this center is clockwise.
-
-        Uses the sign of the 2D cross product.
-        """
-        cross = (x0 - cx) * (y1 - cy) - (y0 - cy) * (x1 - cx)
-        return cross < 0
-
-    # Select center that matches requested direction
-    if clockwise:
-        center = (cx1, cy1) if is_clockwise(cx1, cy1) else (cx2, cy2)
-    else:
-        center = (cx1, cy1) if not is_clockwise(cx1, cy1) else (cx2, cy2)
-
-    # Negative R means "long way around" → flip center choice
-    if r < 0:
-        center = (cx2, cy2) if center == (cx1, cy1) else (cx1, cy1)
+    # Candidate centers lie at mid +/- n*h. For the "+" center the cross
+    # product of the start and end radius vectors is h * chord_len >= 0,
+    # i.e. the short arc around it is always counter-clockwise. So the
+    # short CW arc uses the "-" center, the short CCW arc the "+" center,
+    # and negative R ("long way around") swaps the choice.
+    if clockwise != (r < 0):
+        h = -h
 
-    return center
+    return (mx + nx * h, my + ny * h)
@@ -21,6 +21,40 @@ except ImportError:
     from streamer import GCodeStreamer
 
 
+# Soft limits (you’ll likely want these configurable later)
+DEFAULT_SOFT_LIMITS = (
+    ("X", (0.0, 300.0)),
+    ("Y", (0.0, 300.0)),
+    ("Z", (-100.0, 0.0)),
+)
+
+# (CNCPlanner keyword, config option, type, default)
+PLANNER_OPTIONS = (
+    ("max_velocity", "max_velocity", float, 150.0),
+    ("max_accel", "max_accel", float, 1000.0),
+    ("junction_deviation", "junction_deviation", float, 0.05),
+    ("buffer_time", "planner_buffer_time", float, 0.250),
+    ("keep_tail_moves", "planner_keep_tail_moves", int, 2),
+    ("max_window_moves", "planner_max_window_moves", int, 200),
+)
+
+# Runner tuning (important for HOLD/CANCEL responsiveness)
+# (config option / attribute, type, default)
+RUNNER_OPTIONS = (
+    ("pump_interval", float, 0.010),  # seconds
+    ("max_lines_per_pump", int, 25),
+    ("max_steps_per_pump", int, 15),
+    ("max_toolhead_buffer_time", float, 0.25),
+    ("drain_check_interval", float, 0.050),
+)
+
+
+def _cfg_get(config, name, typ, default):
+    # Test configs may not provide the Klipper getfloat/getint helpers
+    fn = getattr(config, "getfloat" if typ is float else "getint", None)
+    return fn(name, default) if fn else default
+
+
 class CNCMode:
     """
     Reactor/timer-driven CNC streaming execution.
@@ -32,47 +66,27 @@ class CNCMode:
         self.gcode = self.printer.lookup_object("gcode")
         self.log = logging.getLogger(__name__)
 
-        def cfg_getfloat(name, default):
-            fn = getattr(config, "getfloat", None)
-            return fn(name, default) if fn else default
-
-        def cfg_getint(name, default):
-            fn = getattr(config, "getint", None)
-            return fn(name, default) if fn else default
-
         # Modal state + interpreter
         self.state = CNCModalState()
 
-        # Soft limits (you’ll likely want these configurable later)
-        limits = SoftLimits({
-            "X": (0.0, 300.0),
-            "Y": (0.0, 300.0),
-            "Z": (-100.0, 0.0),
-        })
+        limits = SoftLimits(dict(DEFAULT_SOFT_LIMITS))
         self.interpreter = CNCInterpreter(self.state, soft_limits=limits)
 
         # Executor -> toolhead
         self.executor = KlipperMotionExecutor(self.printer)
 
         # Planner
-        self.planner = CNCPlanner(
-            max_velocity=cfg_getfloat("max_velocity", 150.0),
-            max_accel=cfg_getfloat("max_accel", 1000.0),
-            junction_deviation=cfg_getfloat("junction_deviation", 0.05),
-            buffer_time=cfg_getfloat("planner_buffer_time", 0.250),
-            keep_tail_moves=cfg_getint("planner_keep_tail_moves", 2),
-            max_window_moves=cfg_getint("planner_max_window_moves", 200),
-        )
+        self.planner = CNCPlanner(**{
+            kw: _cfg_get(config, name, typ, default)
+            for kw, name, typ, default in PLANNER_OPTIONS
+        })
 
         # Controller
         self.controller = CNCController(self.executor, program=None, planner=self.planner)
 
-        # Runner tuning (important for HOLD/CANCEL responsiveness)
-        self.pump_interval = cfg_getfloat("pump_interval", 0.010)  # seconds
-        self.max_lines_per_pump = cfg_getint("max_lines_per_pump", 25)
-        self.max_steps_per_pump = cfg_getint("max_steps_per_pump", 15)
-        self.max_toolhead_buffer_time = cfg_getfloat("max_toolhead_buffer_time", 0.25)
-        self.drain_check_interval = cfg_getfloat("drain_check_interval", 0.050)
+        # Runner tuning
+        for name, typ, default in RUNNER_OPTIONS:
+            setattr(self, name, _cfg_get(config, name, typ, default))
 
         # Job state
         self._streamer = None
@@ -124,16 +138,32 @@ class CNCMode:
             if sdroot:
                 filepath = os.path.join(sdroot, filepath)
 
-        if not os.path.exists(filepath):
+        # Open once; a missing file is reported from the open itself
+        try:
+            fd = os.open(filepath, os.O_RDONLY)
+        except FileNotFoundError:
             raise gcmd.error(f"File not found: {filepath}")
+        except OSError as e:
+            # Permission denied, a directory, too many open files, ...
+            raise gcmd.error(f"Unable to open {filepath}: {e.strerror}")
+
+        try:
+            streamer = GCodeStreamer.from_fd(fd, filepath)
+        except OSError as e:
+            # os.open() accepts a directory; fdopen() is where it fails
+            os.close(fd)
+            raise gcmd.error(f"Unable to open {filepath}: {e.strerror}")
+        except Exception:
+            # The streamer never took ownership of the descriptor
+            os.close(fd)
+            raise
 
         # Clean run
         self.state.reset()
         self.controller.reset()
 
         self._filepath = filepath
-        self._streamer = GCodeStreamer(filepath)
-        self._streamer.open()
+        self._streamer = streamer
 
         self.controller.start()
         self._job_state = "running"
@@ -187,53 +217,62 @@ class CNCMode:
         self.log.info("CNC job stopped: %s", why)
 
     def _work_handler(self, eventtime):
+        reactor = self.reactor
         if self._job_state == "idle":
-            return self.reactor.NEVER
+            return reactor.NEVER
+
+        # Hot objects bound once per tick (_job_state is re-read since
+        # _stop_job() may change it mid-handler)
+        ctrl = self.controller
+        exe = self.executor
+        streamer = self._streamer
+        interp = self.interpreter
+        pump_interval = self.pump_interval
 
         try:
             # Cancelled state from controller
-            if self.controller.state == ControllerState.CANCELLED:
+            if ctrl.state == ControllerState.CANCELLED:
                 self._stop_job("cancelled")
-                return self.reactor.NEVER
+                return reactor.NEVER
 
             # If we’re over-buffered in toolhead, yield
-            buf = self.executor.buffer_time(eventtime)
+            buf = exe.buffer_time(eventtime)
             if buf > self.max_toolhead_buffer_time:
-                return eventtime + self.pump_interval
+                return eventtime + pump_interval
 
             # Pump controller
             if self._job_state == "hold":
                 # Fill lookahead but do not execute steps
-                self.controller.pump(self._streamer, self.interpreter,
-                                     max_lines=self.max_lines_per_pump,
-                                     max_steps=0)
+                ctrl.pump(streamer, interp,
+                          max_lines=self.max_lines_per_pump,
+                          max_steps=0)
             else:
-                self.controller.pump(self._streamer, self.interpreter,
-                                     max_lines=self.max_lines_per_pump,
-                                     max_steps=self.max_steps_per_pump)
+                ctrl.pump(streamer, interp,
+                          max_lines=self.max_lines_per_pump,
+                          max_steps=self.max_steps_per_pump)
 
             # Transition to draining after controller reports no more internal work
-            if self._job_state != "hold" and self.controller.is_done():
+            if self._job_state != "hold" and ctrl.is_done():
                 self._job_state = "draining"
 
             if self._job_state == "draining":
                 # Wait until toolhead queue drains, then declare done
-                buf2 = self.executor.buffer_time(eventtime)
+                buf2 = exe.buffer_time(eventtime)
                 if buf2 <= 0.010:
                     fname = os.path.basename(self._filepath or "job")
                     self._stop_job("complete")
                     self.gcode.respond_info(f"CNC job complete: {fname}")
-                    return self.reactor.NEVER
+                    return reactor.NEVER
                 return eventtime + self.drain_check_interval
 
-            return eventtime + self.pump_interval
+            return eventtime + pump_interval
 
         except Exception as e:
             # Stop job and surface error
             self.log.exception("CNC runner exception")
             self._stop_job(f"error: {e}")
             self.gcode.respond_info(f"CNC job error: {e}")
-            return self.reactor.NEVER
+            return reactor.NEVER
 
 
 def load_config(config):
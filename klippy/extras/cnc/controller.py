@@ -1,16 +1,36 @@
 # klippy/extras/cnc/controller.py
 
+import logging
+import sys
+import threading
 from enum import Enum
 from collections import deque
+from functools import lru_cache
 
 
 # New: streaming planner (raw MotionPrimitive -> PlannedPrimitive)
 try:
     from .parser import parse_gcode_line
-    from .planner import CNCPlanner, PlannedPrimitive
+    from .planner import CNCPlanner
 except ImportError:
     from parser import parse_gcode_line
-    from planner import CNCPlanner, PlannedPrimitive
+    from planner import CNCPlanner
+
+
+# Distance of completed motion between progress reports (mm)
+REPORT_STEP = 10.0
+
+
+@lru_cache(maxsize=4096)
+def _parse_cached(line):
+    """
+    Memoized parse_gcode_line().
+
+    Job files repeat many lines verbatim (retracts, plunges, tool-off
+    commands), so identical raw lines skip tokenizing entirely. The
+    returned dict is shared between hits; the interpreter only reads it.
+    """
+    return parse_gcode_line(line)
 
 
 def format_time(seconds):
@@ -24,10 +44,8 @@ def format_time(seconds):
 
     Used for ETA reporting during CNC job execution.
     """
-    seconds = int(max(0, seconds))
-    h = seconds // 3600
-    m = (seconds % 3600) // 60
-    s = seconds % 60
+    m, s = divmod(int(max(0, seconds)), 60)
+    h, m = divmod(m, 60)
 
     if h > 0:
         return f"{h}h {m}m {s}s"
@@ -54,7 +72,8 @@ class CNCController:
     Responsibilities:
     - Stream G-code from a source (via streamer)
     - Convert G-code lines into motion primitives
-    - Maintain a planned lookahead queue (PlannedPrimitive)
+    - Maintain a planned lookahead queue (primitives unwrapped from
+      PlannedPrimitive as they are committed)
     - Execute motion primitives one at a time
     - Handle feed hold, resume, cancel, and reset
     - Track progress and estimate remaining time
@@ -64,6 +83,10 @@ class CNCController:
         # Motion executor (e.g. KlipperMotionExecutor)
         self.executor = executor
 
+        # Status/progress messages go through logging (klippy routes its
+        # log records through a background queue handler)
+        self.log = logging.getLogger(__name__)
+
         # Program object (may be None in streaming mode)
         self.program = program
 
@@ -75,9 +98,13 @@ class CNCController:
         # Current controller state
         self.state = ControllerState.IDLE
 
+        # Set while run_stream() may make progress (RUNNING or CANCELLED);
+        # lets a blocking run_stream() sleep through HOLD/IDLE
+        self._run_event = threading.Event()
+
         # Planned queue feeding executor
         # (In legacy mode, we use self.buffer instead)
-        self.ready_queue = deque()   # deque[PlannedPrimitive]
+        self.ready_queue = deque()   # deque[MotionPrimitive], already planned
         self.lookahead_size = 20     # number of planned moves to keep ready
 
         # Legacy raw buffer (used only if planner is None)
@@ -89,9 +116,10 @@ class CNCController:
         # Progress tracking (safe for streaming execution)
         self.total_length = 0.0
         self.completed_length = 0.0
+        self._pct_per_mm = 0.0  # 100 / total_length, once it is known
 
-        # Last distance at which progress was reported
-        self._last_reported = -1
+        # Completed distance at which progress is next reported
+        self._next_report = REPORT_STEP - 1
 
     # -------------------------
     # Streaming execution
@@ -102,6 +130,7 @@ class CNCController:
         Set the total planned motion length for progress reporting.
         """
         self.total_length = total_length
+        self._pct_per_mm = 100.0 / total_length if total_length > 0 else 0.0
 
     def run_stream(self, streamer, interpreter):
         """
@@ -114,55 +143,27 @@ class CNCController:
         - Maintains a planned lookahead queue
         - Executes primitives as long as the controller is RUNNING
         """
-        print("[DBG] run_stream entered")
+        self.log.debug("run_stream entered")
         streamer.open()
 
         try:
             while True:
                 # ---- CANCEL ----
                 if self.state == ControllerState.CANCELLED:
-                    print("[DBG] cancelled")
+                    self.log.debug("cancelled")
                     break
 
                 # ---- FILL LOOKAHEAD ----
-                if self.planner is None:
-                    # Legacy mode: fill raw primitive buffer
-                    while not self.eof and len(self.buffer) < self.lookahead_size:
-                        line = streamer.next_line()
-
-                        if line is None:
-                            self.eof = True
-                            print("[DBG] EOF reached")
-                            break
-
-                        words = parse_gcode_line(line)
-                        primitives = interpreter.interpret(words)
-                        for p in primitives:
-                            self.buffer.append(p)
-                else:
-                    # Planned mode: fill planned queue
-                    # (Keep reading until we have enough *planned* moves ready to execute)
-                    while not self.eof and len(self.ready_queue) < self.lookahead_size:
-                        line = streamer.next_line()
-
-                        if line is None:
-                            # No more input: finalize planner and push remaining planned moves
-                            self.eof = True
-                            print("[DBG] EOF reached")
-                            self.ready_queue.extend(self.planner.finish())
-                            break
-
-                        words = parse_gcode_line(line)
-                        primitives = interpreter.interpret(words)
-
-                        for p in primitives:
-                            committed = self.planner.push(p)
-                            if committed:
-                                self.ready_queue.extend(committed)
+                if not self.eof:
+                    self._fill_lookahead(streamer, interpreter)
+                    if self.eof:
+                        self.log.debug("EOF reached")
 
                 # ---- HOLD ----
-                # If not actively running, do not execute motion
+                # If not actively running, do not execute motion; sleep
+                # until start/resume/cancel instead of spinning
                 if self.state != ControllerState.RUNNING:
+                    self._run_event.wait()
                     continue
 
                 # ---- EXECUTE ONE STEP ----
@@ -173,70 +174,100 @@ class CNCController:
                     if self.planner is None:
                         # End when no more data AND raw buffer is empty
                         if self.eof and not self.buffer:
-                            print("[CTRL] job complete")
+                            self.log.info("CNC controller: job complete")
                             break
                     else:
                         # End when no more data AND planned queue is empty
                         if self.eof and not self.ready_queue:
-                            print("[CTRL] job complete")
+                            self.log.info("CNC controller: job complete")
                             break
 
         finally:
             streamer.close()
-            print("[DBG] streamer closed")
+            self.log.debug("streamer closed")
 
     def pump(self, streamer, interpreter, max_lines=50, max_steps=20):
         """
         Incremental execution: read <= max_lines, then execute <= max_steps.
         Safe to call from a reactor timer callback.
         """
-        lines_read = 0
         steps = 0
 
         # Fill lookahead / ready queue
+        lines_read = self._fill_lookahead(streamer, interpreter, max_lines)
+
+        # Execute a batch of steps if RUNNING
+        if self.state == ControllerState.RUNNING and max_steps > 0:
+            batch = self._take_batch(max_steps)
+            if batch:
+                self._execute_batch(batch)
+            steps = len(batch)
+
+        return lines_read, steps
+
+    def _fill_lookahead(self, streamer, interpreter, max_lines=None):
+        """
+        Read, parse and interpret lines until the lookahead is full,
+        the input ends or max_lines lines were read (None: no limit).
+
+        Primitives go to the raw buffer in legacy mode, or through the
+        planner into the ready queue. Returns the number of lines read.
+        """
+        if max_lines is None:
+            max_lines = sys.maxsize
+        lines_read = 0
+
+        # Interpreters without a batched path are driven one line at a time
+        interpret_batch = getattr(interpreter, "interpret_batch", None)
+        if interpret_batch is None:
+            interpret = interpreter.interpret
+            def interpret_batch(batch):
+                prims = []
+                for parsed in batch:
+                    prims.extend(interpret(parsed))
+                return prims
+
         if self.planner is None:
             # Legacy raw-buffer mode
             while (not self.eof
                    and len(self.buffer) < self.lookahead_size
                    and lines_read < max_lines):
-                line = streamer.next_line()
-                if line is None:
-                    self.eof = True
-                    break
-                parsed = parse_gcode_line(line)
-                prims = interpreter.interpret(parsed)
-                for p in prims:
-                    self.buffer.append(p)
-                lines_read += 1
+                batch = self._read_parsed(
+                    streamer, min(self.lookahead_size - len(self.buffer),
+                                  max_lines - lines_read))
+                lines_read += len(batch)
+                self.buffer.extend(interpret_batch(batch))
         else:
             # Planned mode
+            push_batch = self.planner.push_batch
             while (not self.eof
                    and len(self.ready_queue) < self.lookahead_size
                    and lines_read < max_lines):
-                line = streamer.next_line()
-                if line is None:
-                    self.eof = True
+                batch = self._read_parsed(
+                    streamer, min(self.lookahead_size - len(self.ready_queue),
+                                  max_lines - lines_read))
+                lines_read += len(batch)
+                committed = push_batch(interpret_batch(batch))
+                if committed:
+                    self.ready_queue.extend(pp.primitive for pp in committed)
+
+                if self.eof:
                     # Flush remaining planned moves
-                    self.ready_queue.extend(self.planner.finish())
-                    break
+                    self.ready_queue.extend(
+                        pp.primitive for pp in self.planner.finish())
 
-                parsed = parse_gcode_line(line)
-                prims = interpreter.interpret(parsed)
-                for p in prims:
-                    committed = self.planner.push(p)
-                    if committed:
-                        self.ready_queue.extend(committed)
-                lines_read += 1
+        return lines_read
 
-        # Execute a few steps if RUNNING
-        if self.state == ControllerState.RUNNING and max_steps > 0:
-            while steps < max_steps:
-                did = self.step()
-                if not did:
-                    break
-                steps += 1
+    def _read_parsed(self, streamer, count):
+        """
+        Read and parse up to count lines from the streamer.
 
-        return lines_read, steps
+        Sets self.eof when the streamer runs out.
+        """
+        lines = streamer.next_lines(count)
+        if len(lines) < count:
+            self.eof = True
+        return [_parse_cached(line) for line in lines]
 
     def is_done(self):
         """
@@ -260,6 +291,7 @@ class CNCController:
         if self.state == ControllerState.CANCELLED:
             raise RuntimeError("Controller is cancelled; reset required")
         self.state = ControllerState.RUNNING
+        self._run_event.set()
 
     def feed_hold(self):
         """
@@ -267,8 +299,9 @@ class CNCController:
         """
         if self.state == ControllerState.RUNNING:
             self.state = ControllerState.HOLD
+            self._run_event.clear()
             self.report_progress()
-            print("[CTRL] feed hold")
+            self.log.info("CNC controller: feed hold")
 
     def resume(self):
         """
@@ -276,13 +309,15 @@ class CNCController:
         """
         if self.state == ControllerState.HOLD:
             self.state = ControllerState.RUNNING
-            print("[CTRL] resume")
+            self._run_event.set()
+            self.log.info("CNC controller: resume")
 
     def reset(self):
         """
         Reset controller state and clear all execution buffers.
         """
         self.state = ControllerState.IDLE
+        self._run_event.clear()
 
         # Clear buffers
         self.buffer.clear()
@@ -292,12 +327,16 @@ class CNCController:
         if self.planner is not None:
             self.planner.reset()
 
+        # Drop memoized parses from the previous job
+        _parse_cached.cache_clear()
+
         # Reset stream state / progress
         self.eof = False
         self.total_length = 0.0
         self.completed_length = 0.0
-        self._last_reported = -1
-        print("[CTRL] reset")
+        self._pct_per_mm = 0.0
+        self._next_report = REPORT_STEP - 1
+        self.log.info("CNC controller: reset")
 
     def cancel(self):
         """
@@ -305,7 +344,9 @@ class CNCController:
         """
         if self.state != ControllerState.CANCELLED:
             self.state = ControllerState.CANCELLED
-            print("[CTRL] cancelled")
+            # Wake a run_stream() waiting in HOLD so it can exit
+            self._run_event.set()
+            self.log.info("CNC controller: cancelled")
 
     # -------------------------
     # Execution
@@ -332,18 +373,12 @@ class CNCController:
         if not self.ready_queue:
             return False
 
-        item = self.ready_queue.popleft()
-        if isinstance(item, PlannedPrimitive):
-            p = item.primitive
-        else:
-            # Safety: in case something non-planned was queued
-            p = item
-
-        return self._execute_primitive(p)
+        return self._execute_primitive(self.ready_queue.popleft())
 
-    def _execute_primitive(self, p):
+    @staticmethod
+    def _check_feedrate(p):
         """
-        Execute a MotionPrimitive and update progress.
+        Raise if a MotionPrimitive reaches execution without a feedrate.
         """
         # Feedrate must be fully resolved by execution time
         if p.feedrate is None:
@@ -352,20 +387,75 @@ class CNCController:
                 f"(pos={p.start} → {p.end}, mode={p.motion})"
             )
 
+    def _execute_primitive(self, p):
+        """
+        Execute a MotionPrimitive and update progress.
+        """
+        self._check_feedrate(p)
+
         # Send motion to the executor (Klipper backend or mock)
         self.executor.execute(p)
 
         # Update completed motion length
-        self.completed_length += p.length()
+        completed = self.completed_length + p.length()
+        self.completed_length = completed
 
         # Report progress every fixed distance of actual motion
-        REPORT_STEP = 10.0  # mm
-        if self.completed_length - self._last_reported >= REPORT_STEP:
-            self._last_reported = self.completed_length
+        if completed >= self._next_report:
+            self._next_report = completed + REPORT_STEP
             self.report_progress()
 
         return True
 
+    def _take_batch(self, max_steps):
+        """
+        Pop up to max_steps primitives from the lookahead queue/buffer.
+        """
+        queue = self.buffer if self.planner is None else self.ready_queue
+        popleft = queue.popleft
+        batch = [popleft() for _ in range(min(max_steps, len(queue)))]
+
+        # Stop after an unresolved feedrate and leave the rest queued,
+        # as step-by-step execution would
+        for i, p in enumerate(batch):
+            if p.feedrate is None:
+                queue.extendleft(reversed(batch[i + 1:]))
+                del batch[i + 1:]
+                break
+        return batch
+
+    def _execute_batch(self, batch):
+        """
+        Execute a list of MotionPrimitives in one executor call and
+        update progress once for the whole batch.
+
+        Only the last primitive can lack a feedrate (see _take_batch):
+        the ones before it are executed, then it raises.
+        """
+        last = batch[-1]
+        if last.feedrate is None:
+            if len(batch) > 1:
+                self._execute_batch(batch[:-1])
+            self._check_feedrate(last)
+
+        # Executors without a batched path get one execute() per primitive
+        execute_batch = getattr(self.executor, "execute_batch", None)
+        if execute_batch is not None:
+            execute_batch(batch)
+        else:
+            execute = self.executor.execute
+            for p in batch:
+                execute(p)
+
+        # Update completed motion length
+        completed = self.completed_length + sum(p.length() for p in batch)
+        self.completed_length = completed
+
+        # Report progress every fixed distance of actual motion
+        if completed >= self._next_report:
+            self._next_report = completed + REPORT_STEP
+            self.report_progress()
+
     # -------------------------
     # Progress / ETA
     # -------------------------
@@ -377,7 +467,7 @@ class CNCController:
         if self.total_length <= 0.0:
             return
 
-        pct = (self.completed_length / self.total_length) * 100.0
+        pct = self.completed_length * self._pct_per_mm
         remaining_len = max(self.total_length - self.completed_length, 0.0)
 
         # Feedrate is tracked by the executor (optional).
@@ -385,12 +475,12 @@ class CNCController:
         feed = getattr(self.executor, "last_feedrate", None)
 
         if feed and feed > 0:
-            remaining_time = (remaining_len / feed) * 60.0
+            remaining_time = remaining_len * 60.0 / feed
             eta = format_time(remaining_time)
         else:
             eta = "?"
 
-        print(f"[PROGRESS] {pct:.1f}% | ETA {eta}")
+        self.log.info("CNC progress: %.1f%% | ETA %s", pct, eta)
 
     def flush(self):
         """
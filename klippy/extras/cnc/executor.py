@@ -32,6 +32,17 @@ class MotionExecutor(ABC):
         """
         pass
 
+    def execute_batch(self, primitives):
+        """
+        Execute a sequence of MotionPrimitives in order.
+
+        The controller hands over several primitives per pump; the
+        default simply calls execute() for each. Backends with a
+        cheaper bulk path can override this.
+        """
+        for primitive in primitives:
+            self.execute(primitive)
+
     @abstractmethod
     def flush(self):
         """
@@ -1,5 +1,14 @@
 # klippy/extras/cnc/file_loader.py
 
+try:
+    from .streamer import advise_sequential
+except ImportError:
+    from streamer import advise_sequential
+
+# Buffer size for reading G-code files
+READ_BUFFER_SIZE = 1 << 20
+
+
 class GCodeFileLoader:
     """
     Simple loader for G-code files.
@@ -14,33 +23,29 @@ class GCodeFileLoader:
         # Path to the G-code (.nc / .gcode) file
         self.filename = filename
 
-    def load(self):
+    def iter_lines(self):
         """
-        Load and preprocess the G-code file.
+        Yield non-empty, comment-free G-code lines one at a time.
 
-        Returns a list of non-empty, comment-free G-code lines.
+        Only the current line is held in memory, so this is the
+        preferred API for large programs.
         """
-        lines = []
-
-        with open(self.filename, "r") as f:
+        with open(self.filename, "r", buffering=READ_BUFFER_SIZE) as f:
+            advise_sequential(f.fileno())
             for raw_line in f:
-                # Remove leading/trailing whitespace
-                line = raw_line.strip()
-
-                # Skip blank lines
-                if not line:
-                    continue
-
-                # Strip semicolon-style comments
+                # Strip semicolon-style comments and whitespace
                 # (Inline comments after code are also removed)
-                if ";" in line:
-                    line = line.split(";", 1)[0].strip()
+                line = raw_line.partition(";")[0].strip()
+                if line:
+                    yield line
 
-                # Line may become empty after stripping comments
-                if not line:
-                    continue
+    def __iter__(self):
+        return self.iter_lines()
 
-                # Store cleaned G-code line
-                lines.append(line)
+    def load(self):
+        """
+        Load and preprocess the G-code file.
 
-        return lines
+        Returns a list of non-empty, comment-free G-code lines.
+        """
+        return list(self.iter_lines())
@@ -27,178 +27,236 @@ class CNCInterpreter:
         ox, oy, oz = self.state.work_offsets[self.state.active_wcs]
         return (position_mm[0] + ox, position_mm[1] + oy, position_mm[2] + oz)
 
+    def interpret_batch(self, parsed_lines):
+        """
+        Interpret several parsed lines in order.
+
+        Returns one flat list of MotionPrimitives, so callers feeding
+        a chunk of lines make a single call.
+        """
+        prims = []
+        extend = prims.extend
+        interpret = self.interpret
+        for parsed in parsed_lines:
+            extend(interpret(parsed))
+        return prims
+
     def interpret(self, parsed):
         if not parsed:
             return []
 
+        state = self.state
         words = parsed.get("words", {})
         gcodes = parsed.get("gcodes", [])
 
         # Modal updates first
-        for g in gcodes:
-            self._handle_g(g)
+        if gcodes:
+            handlers = _G_HANDLERS
+            for g in gcodes:
+                if 0 <= g < G_TABLE_SIZE:
+                    handler = handlers[g]
+                    if handler is not None:
+                        handler(state)
 
         # Feedrate update
-        if "F" in words:
-            self.state.update_feedrate(words["F"])
-
-        # Collect motion words
-        target = {}
-        for k in ("X", "Y", "Z", "I", "J", "K", "R"):
-            if k in words:
-                target[k] = words[k]
-
-        motion = self.state.motion_mode
-
-        # If no XYZ target and not arc geometry, nothing to do
-        if not any(k in target for k in ("X", "Y", "Z")) and motion not in (MotionType.ARC_CW, MotionType.ARC_CCW):
+        f = words.get("F")
+        if f is not None:
+            state.update_feedrate(f)
+
+        motion = state.motion_mode
+        is_arc = motion is MotionType.ARC_CW or motion is MotionType.ARC_CCW
+
+        # G0/G1 fast path: if no XYZ target and not arc geometry, nothing
+        # to do. The parsed words are used directly as the motion target
+        # (resolve_target only reads XYZ, _interp_arc only IJK/R).
+        if (not is_arc and "X" not in words and "Y" not in words
+                and "Z" not in words):
             return []
 
         # Resolve program-space endpoints (mm) and update program position
-        start_prog = tuple(self.state.position)
-        end_prog = tuple(self.state.resolve_target(target))
-        self.state.position = list(end_prog)
+        start_prog = tuple(state.position)
+        end_prog = tuple(state.resolve_target(words))
+        state.position = list(end_prog)
 
         # Convert to machine-space (apply WCS)
         start = self.apply_work_offset(start_prog)
         end = self.apply_work_offset(end_prog)
 
         # Optional: bounds check final endpoint
-        if self.soft_limits is not None:
-            self.soft_limits.check_point(end)  # may raise SoftLimitError
+        soft_limits = self.soft_limits
+        if soft_limits is not None:
+            soft_limits.check_point(end)  # may raise SoftLimitError
 
         # Dispatch motion
-        if motion in (MotionType.ARC_CW, MotionType.ARC_CCW):
-            return self._interp_arc(motion, start_prog, end_prog, target)
+        if is_arc:
+            return self._interp_arc(motion, start_prog, end_prog, words, start)
         else:
             return self._interp_linear(motion, start, end)
 
     def _interp_linear(self, motion, start, end):
+        state = self.state
+
         # Choose feedrate
-        if motion == MotionType.RAPID:
-            feed = self.state.rapid_feedrate
+        if motion is MotionType.RAPID:
+            feed = state.rapid_feedrate
         else:
-            feed = self.state.feedrate
+            feed = state.feedrate
             if feed is None:
                 raise ValueError("Feedrate not set (missing F...) for G1/G2/G3 motion")
 
-        segs = segment_linear(start, end, feed, self.state.max_segment_time)
-        prims = []
-        for s0, s1 in segs:
-            prims.append(MotionPrimitive(motion, tuple(s0), tuple(s1), feed))
-        return prims
+        speed = feed / 60.0
 
-    def _interp_arc(self, motion, start_prog, end_prog, target):
-        clockwise = (motion == MotionType.ARC_CW)
-        plane = self.state.plane
-
-        # Plane axis mapping: (a,b) is arc plane, c is perpendicular axis
-        if plane == "G17":      # XY, Z perpendicular
-            ax, ay, az = 0, 1, 2
-        elif plane == "G18":    # XZ, Y perpendicular
-            ax, ay, az = 0, 2, 1
-        elif plane == "G19":    # YZ, X perpendicular
-            ax, ay, az = 1, 2, 0
-        else:
-            raise ValueError(f"Unsupported plane: {plane}")
+        # Fast path: moves short enough for a single time-bounded segment
+        # (the common case for finishing passes) skip segment_linear()
+        if start == end:
+            return []
+        if math.dist(start, end) <= speed * state.max_segment_time:
+            return [MotionPrimitive(motion, start, end, feed, speed)]
+
+        # segment_linear() already yields tuple points, used as-is
+        segs = segment_linear(start, end, feed, state.max_segment_time)
+        return [MotionPrimitive(motion, s0, s1, feed, speed) for s0, s1 in segs]
+
+    def _interp_arc(self, motion, start_prog, end_prog, target, start):
+        state = self.state
+        clockwise = motion is MotionType.ARC_CW
+
+        # Plane axis mapping: (a,b) is arc plane, c is perpendicular axis,
+        # wa/wb are the IJK words giving the center offset along a/b
+        ax, ay, az, wa, wb = state.plane_axes
 
         s2 = (start_prog[ax], start_prog[ay])
         e2 = (end_prog[ax], end_prog[ay])
 
         # Center from R or IJK
-        scale = self.state.units_scale
+        scale = state.units_scale
         if "R" in target:
             r = float(target["R"]) * scale
             center = compute_arc_center_from_r(s2, e2, r, clockwise)
         else:
             # IJK are offsets in the fixed XYZ axes, regardless of plane
-            i = float(target.get("I", 0.0)) * scale
-            j = float(target.get("J", 0.0)) * scale
-            k = float(target.get("K", 0.0)) * scale
-            if plane == "G17":
-                center = (s2[0] + i, s2[1] + j)
-            elif plane == "G18":
-                center = (s2[0] + i, s2[1] + k)
-            else:  # G19
-                center = (s2[0] + j, s2[1] + k)
+            center = (s2[0] + float(target.get(wa, 0.0)) * scale,
+                      s2[1] + float(target.get(wb, 0.0)) * scale)
 
         points = segment_arc(
             start=s2,
             end=e2,
             center=center,
             clockwise=clockwise,
-            tolerance=self.state.arc_tolerance,
+            tolerance=state.arc_tolerance,
         )
 
         # Helix interpolation on perpendicular axis
         delta_perp = end_prog[az] - start_prog[az]
 
-        # Total XY/XZ/YZ length for proper helix fraction
-        total_len = 0.0
-        prev2 = s2
-        for p in points:
-            total_len += math.hypot(p[0] - prev2[0], p[1] - prev2[1])
-            prev2 = p
-        if total_len <= 1e-12:
+        # segment_arc() steps by a constant angle, so every chord has the
+        # same length and the helix rises by the same amount per segment
+        # (no per-point length accumulation needed)
+        # (points is a flat x, y, x, y, ... array)
+        n = len(points) // 2
+        if n == 0:
             return []
-
+        chord = math.hypot(points[0] - s2[0], points[1] - s2[1])
+        if chord * n <= 1e-12:
+            return []
+        perp_step = delta_perp / n
+
+        # For segmented arcs, emit linear primitives (your planner handles smoothing)
+        feed = state.feedrate
+        if feed is None:
+            raise ValueError("Feedrate not set (missing F...) for G2/G3 motion")
+        speed = feed / 60.0
+
+        # Segment points, helix and WCS offset are combined in one pass:
+        # machine coordinates are written directly per plane axis
+        offset = state.work_offsets[state.active_wcs]
+        oa = offset[ax]
+        ob = offset[ay]
+        c0 = start_prog[az] + offset[az]
+
+        linear = MotionType.LINEAR
         prims = []
-        prev_prog = list(start_prog)
-        prev_machine = list(self.apply_work_offset(prev_prog))
+        append = prims.append
+        prev_machine = start
+
+        it = iter(points)
+        for i, (pa, pb) in enumerate(zip(it, it), 1):
+            m = [0.0, 0.0, 0.0]
+            m[ax] = pa + oa
+            m[ay] = pb + ob
+            m[az] = c0 + perp_step * i
+            next_machine = tuple(m)
+
+            append(MotionPrimitive(linear, prev_machine, next_machine, feed, speed))
+            prev_machine = next_machine
 
-        traveled = 0.0
-        prev2 = s2
-        for p in points:
-            seg_len = math.hypot(p[0] - prev2[0], p[1] - prev2[1])
-            traveled += seg_len
-            frac = min(1.0, traveled / total_len)
+        # Arcs can bulge past their end point: bounds check every
+        # segment end in one batch
+        soft_limits = self.soft_limits
+        if soft_limits is not None:
+            soft_limits.check_points([p.end for p in prims])
 
-            next_prog = list(prev_prog)
-            next_prog[ax] = p[0]
-            next_prog[ay] = p[1]
-            next_prog[az] = start_prog[az] + delta_perp * frac
+        return prims
 
-            next_machine = list(self.apply_work_offset(next_prog))
+    def _handle_g(self, gcode_num):
+        # Direct-indexed table lookup; unsupported codes are ignored
+        if 0 <= gcode_num < G_TABLE_SIZE:
+            handler = _G_HANDLERS[gcode_num]
+            if handler is not None:
+                handler(self.state)
 
-            # For segmented arcs, emit linear primitives (your planner handles smoothing)
-            feed = self.state.feedrate
-            if feed is None:
-                raise ValueError("Feedrate not set (missing F...) for G2/G3 motion")
-            prims.append(MotionPrimitive(MotionType.LINEAR, tuple(prev_machine), tuple(next_machine), feed))
 
-            prev_prog = next_prog
-            prev_machine = next_machine
-            prev2 = p
+# -------------------------
+# Modal G-code dispatch
+# -------------------------
 
-        return prims
+# G-code numbers are small integers, so handlers live in a flat list
+# indexed by the code: one bounds check + index instead of an if/elif
+# chain per code.
+G_TABLE_SIZE = 100
+_G_HANDLERS = [None] * G_TABLE_SIZE
 
-    def _handle_g(self, gcode_num):
-        # Motion modes
-        if gcode_num == 0:
-            self.state.set_motion_mode(MotionType.RAPID)
-        elif gcode_num == 1:
-            self.state.set_motion_mode(MotionType.LINEAR)
-        elif gcode_num == 2:
-            self.state.set_motion_mode(MotionType.ARC_CW)
-        elif gcode_num == 3:
-            self.state.set_motion_mode(MotionType.ARC_CCW)
-
-        # Distance mode
-        elif gcode_num == 90:
-            self.state.set_distance_mode("G90")
-        elif gcode_num == 91:
-            self.state.set_distance_mode("G91")
-
-        # Units
-        elif gcode_num == 20:
-            self.state.set_units("G20")
-        elif gcode_num == 21:
-            self.state.set_units("G21")
-
-        # Plane
-        elif gcode_num in (17, 18, 19):
-            self.state.set_plane(f"G{gcode_num}")
-
-        # WCS selection (G54..G59)
-        elif 54 <= gcode_num <= 59:
-            self.state.active_wcs = gcode_num - 54
\ No newline at end of file
+
+def _motion_handler(motion):
+    return lambda state: state.set_motion_mode(motion)
+
+
+def _distance_handler(gcode):
+    return lambda state: state.set_distance_mode(gcode)
+
+
+def _units_handler(gcode):
+    return lambda state: state.set_units(gcode)
+
+
+def _plane_handler(gcode):
+    return lambda state: state.set_plane(gcode)
+
+
+def _wcs_handler(index):
+    def handler(state):
+        state.active_wcs = index
+    return handler
+
+
+# Motion modes
+_G_HANDLERS[0] = _motion_handler(MotionType.RAPID)
+_G_HANDLERS[1] = _motion_handler(MotionType.LINEAR)
+_G_HANDLERS[2] = _motion_handler(MotionType.ARC_CW)
+_G_HANDLERS[3] = _motion_handler(MotionType.ARC_CCW)
+
+# Distance mode
+_G_HANDLERS[90] = _distance_handler("G90")
+_G_HANDLERS[91] = _distance_handler("G91")
+
+# Units
+_G_HANDLERS[20] = _units_handler("G20")
+_G_HANDLERS[21] = _units_handler("G21")
+
+# Plane
+for _num in (17, 18, 19):
+    _G_HANDLERS[_num] = _plane_handler(f"G{_num}")
+
+# WCS selection (G54..G59)
+for _num in range(54, 60):
+    _G_HANDLERS[_num] = _wcs_handler(_num - 54)
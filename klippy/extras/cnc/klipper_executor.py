@@ -11,23 +11,49 @@ class KlipperMotionExecutor(MotionExecutor):
         self.printer = printer
         self.toolhead = printer.lookup_object("toolhead")
 
+    @staticmethod
+    def _speed(primitive):
+        # Feedrate is in units/min (mm/min). Klipper expects speed in mm/s,
+        # which the interpreter normally precomputes per line.
+        speed = primitive.speed
+        if speed is None:
+            if primitive.feedrate is None:
+                raise ValueError("Primitive has no feedrate; cannot execute on toolhead")
+            speed = primitive.feedrate / 60.0
+        return speed
+
+    def _position_buffer(self):
+        # Fresh copy of the toolhead position, so the E axis (and any
+        # extra axes) follow changes made outside CNC motion (G92,
+        # homing, ...). Callers overwrite only XYZ; passing the same list
+        # to several moves is safe: Klipper copies it into the Move.
+        buf = list(self.toolhead.get_position())
+        if len(buf) < 4:
+            # Extremely defensive; toolhead should always be 4.
+            buf = (buf + [0.0, 0.0, 0.0, 0.0])[:4]
+        return buf
+
     def execute(self, primitive):
-        # Feedrate is in units/min (mm/min). Klipper expects speed in mm/s.
-        if primitive.feedrate is None:
-            raise ValueError("Primitive has no feedrate; cannot execute on toolhead")
-        speed = primitive.feedrate / 60.0
+        speed = self._speed(primitive)
 
-        x, y, z = primitive.end
+        pos = self._position_buffer()
+        pos[0], pos[1], pos[2] = primitive.end
 
-        # Preserve E axis (toolhead uses 4-axis commanded_pos)
-        curpos = list(self.toolhead.get_position())
-        if len(curpos) < 4:
-            # Extremely defensive; toolhead should always be 4.
-            curpos = (curpos + [0.0, 0.0, 0.0, 0.0])[:4]
-        newpos = curpos[:]
-        newpos[0], newpos[1], newpos[2] = x, y, z
+        self.toolhead.move(pos, speed)
+
+    def execute_batch(self, primitives):
+        # Queue a run of moves with one position read, which also picks
+        # up any E axis change made outside CNC motion since the last
+        # batch (nothing else can move the toolhead while the batch is
+        # queued). Klipper's lookahead replans lazily, so no extra
+        # hinting is needed around the batch.
+        pos = self._position_buffer()
 
-        self.toolhead.move(newpos, speed)
+        move = self.toolhead.move
+        speed_of = self._speed
+        for primitive in primitives:
+            pos[0], pos[1], pos[2] = primitive.end
+            move(pos, speed_of(primitive))
 
     def buffer_time(self, eventtime):
         # Approximate queued motion time remaining in toolhead.
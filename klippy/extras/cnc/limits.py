@@ -34,6 +34,14 @@ class SoftLimits:
         """
         self.limits = limits
 
+        # Flat (x_min, x_max, y_min, y_max, z_min, z_max) bounds for the
+        # per-move check; axes without configured limits are unbounded.
+        inf = float("inf")
+        self._bounds = tuple(
+            float(v) for axis in ("X", "Y", "Z")
+            for v in limits.get(axis, (-inf, inf))
+        )
+
     def check_point(self, point):
         """
         Check a single XYZ point against configured soft limits.
@@ -41,6 +49,13 @@ class SoftLimits:
         :param point: (x, y, z) tuple in machine coordinates
         :raises SoftLimitError: if any axis exceeds its limits
         """
+        x_min, x_max, y_min, y_max, z_min, z_max = self._bounds
+        x, y, z = point
+        if (x_min <= x <= x_max and y_min <= y <= y_max
+                and z_min <= z <= z_max):
+            return
+
+        # Slow path: find the offending axis for the error message
         for axis, value in zip(("X", "Y", "Z"), point):
             # Ignore axes without configured limits
             if axis not in self.limits:
@@ -54,6 +69,30 @@ class SoftLimits:
                     f"(limits {min_v} to {max_v})"
                 )
 
+    def check_points(self, points):
+        """
+        Check a batch of XYZ points against configured soft limits.
+
+        The per-axis extremes of the whole batch are compared once;
+        points are only checked individually (for the error message)
+        when the batch is out of bounds.
+
+        :param points: Sequence of (x, y, z) tuples in machine coordinates
+        :raises SoftLimitError: if any point exceeds the limits
+        """
+        if not points:
+            return
+
+        x_min, x_max, y_min, y_max, z_min, z_max = self._bounds
+        xs, ys, zs = zip(*points)
+        if (x_min <= min(xs) and max(xs) <= x_max
+                and y_min <= min(ys) and max(ys) <= y_max
+                and z_min <= min(zs) and max(zs) <= z_max):
+            return
+
+        for point in points:
+            self.check_point(point)
+
     def check_primitive(self, primitive):
         """
         Check both endpoints of a motion primitive.
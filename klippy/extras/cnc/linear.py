@@ -36,7 +36,15 @@ def segment_linear(start, end, feedrate, max_segment_time):
     # Determine number of segments required to respect max_segment_time
     segments = max(1, math.ceil(move_time / max_segment_time))
 
+    # Per-axis deltas are constant over the move: hoist them out of
+    # the interpolation loop
+    sx, sy, sz = start
+    dx = end[0] - sx
+    dy = end[1] - sy
+    dz = end[2] - sz
+
     segs = []
+    append = segs.append
     prev = start
 
     # Generate linearly interpolated segments
@@ -45,14 +53,10 @@ def segment_linear(start, end, feedrate, max_segment_time):
         t = i / segments
 
         # Interpolate XYZ coordinates
-        next_pt = (
-            start[0] + (end[0] - start[0]) * t,
-            start[1] + (end[1] - start[1]) * t,
-            start[2] + (end[2] - start[2]) * t,
-        )
+        next_pt = (sx + dx * t, sy + dy * t, sz + dz * t)
 
         # Store segment
-        segs.append((prev, next_pt))
+        append((prev, next_pt))
         prev = next_pt
 
     return segs
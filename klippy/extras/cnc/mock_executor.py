@@ -1,7 +1,13 @@
 # klippy/extras/cnc/mock_executor.py
 
+import sys
+
 from executor import MotionExecutor
 
+# Suggested batch_lines for long runs where throughput matters more
+# than seeing every [EXEC] line before an error
+OUTPUT_BATCH_LINES = 1024
+
 
 class MockMotionExecutor(MotionExecutor):
     """
@@ -10,28 +16,51 @@ class MockMotionExecutor(MotionExecutor):
     This executor does not perform real motion. Instead, it:
     - Counts executed primitives
     - Records the last feedrate
-    - Prints execution information to stdout
+    - Prints execution information to stdout (unless verbose=False)
+
+    By default each line is written as soon as its primitive executes,
+    so nothing is lost if a run stops with an error. With batch_lines > 1
+    lines are buffered and written in batches (and on flush()); pending
+    lines are then only written by flush().
 
     Useful for unit tests and dry-run validation.
     """
 
-    def __init__(self):
+    def __init__(self, verbose=True, batch_lines=1):
         # Number of motion primitives executed
         self.count = 0
 
         # Last feedrate received (used for progress / ETA testing)
         self.last_feedrate = None
 
+        # Whether to log each primitive, how many lines to buffer before
+        # writing them, and the pending output lines
+        self.verbose = verbose
+        self.batch_lines = batch_lines
+        self._lines = []
+
     def execute(self, primitive):
         """
         "Execute" a motion primitive by logging it.
         """
         self.count += 1
         self.last_feedrate = primitive.feedrate
-        print(f"[EXEC {self.count}] {primitive}")
+        if self.verbose:
+            lines = self._lines
+            lines.append(f"[EXEC {self.count}] {primitive}")
+            if len(lines) >= self.batch_lines:
+                self._write_lines()
+
+    def _write_lines(self):
+        lines = self._lines
+        if lines:
+            lines.append("")
+            sys.stdout.write("\n".join(lines))
+            lines.clear()
 
     def flush(self):
         """
-        Flush execution (no-op for mock executor).
+        Flush execution (writes out any buffered output).
         """
+        self._write_lines()
         print("[EXEC] flush")
@@ -6,6 +6,15 @@ except ImportError:
     from primitives import MotionType
 
 
+# Arc plane -> (a, b, c, first center word, second center word):
+# (a, b) are the XYZ indices of the arc plane, c the perpendicular axis
+PLANE_AXES = {
+    "G17": (0, 1, 2, "I", "J"),  # XY, Z perpendicular
+    "G18": (0, 2, 1, "I", "K"),  # XZ, Y perpendicular
+    "G19": (1, 2, 0, "J", "K"),  # YZ, X perpendicular
+}
+
+
 class CNCModalState:
     """
     CNC modal state across G-code lines.
@@ -13,6 +22,16 @@ class CNCModalState:
     Work offsets are applied separately when generating machine-space primitives.
     """
 
+    # Read on every interpreted line: slots avoid a per-instance __dict__
+    __slots__ = (
+        "position", "absolute", "feedrate", "motion_mode",
+        "plane", "plane_axes", "units", "units_scale",
+        "active_wcs", "work_offsets",
+        "arc_tolerance", "max_arc_segment_length",
+        "max_core_segment_length", "max_segment_time",
+        "rapid_feedrate",
+    )
+
     def __init__(self):
         self.reset()
 
@@ -29,8 +48,9 @@ class CNCModalState:
         # G0/G1/G2/G3
         self.motion_mode = MotionType.RAPID
 
-        # G17/G18/G19 stored as string (interpreter compares strings)
+        # G17/G18/G19 stored as string, with its axis mapping cached
         self.plane = "G17"
+        self.plane_axes = PLANE_AXES["G17"]
 
         # G20/G21
         self.units = "mm"
@@ -64,8 +84,10 @@ class CNCModalState:
             self.units_scale = 25.4
 
     def set_plane(self, gcode):
-        if gcode in ("G17", "G18", "G19"):
+        axes = PLANE_AXES.get(gcode)
+        if axes is not None:
             self.plane = gcode
+            self.plane_axes = axes
 
     def set_motion_mode(self, motion_mode):
         self.motion_mode = motion_mode
@@ -82,13 +104,22 @@ class CNCModalState:
         Applies units scaling and absolute/incremental mode.
         Does NOT apply WCS offsets.
         """
-        resolved = list(self.position)
-        for axis, idx in (("X", 0), ("Y", 1), ("Z", 2)):
-            if axis not in target_words:
-                continue
-            val_mm = float(target_words[axis]) * self.units_scale
-            if self.absolute:
-                resolved[idx] = val_mm
-            else:
-                resolved[idx] += val_mm
-        return resolved
\ No newline at end of file
+        # Unrolled per axis: no loop/enumerate overhead on every move
+        x, y, z = self.position
+        scale = self.units_scale
+        absolute = self.absolute
+        get = target_words.get
+
+        val = get("X")
+        if val is not None:
+            val = float(val) * scale
+            x = val if absolute else x + val
+        val = get("Y")
+        if val is not None:
+            val = float(val) * scale
+            y = val if absolute else y + val
+        val = get("Z")
+        if val is not None:
+            val = float(val) * scale
+            z = val if absolute else z + val
+        return [x, y, z]
\ No newline at end of file
@@ -7,6 +7,9 @@ import re
 # Examples: X10, Y-2.5, G1, M3
 WORD_RE = re.compile(r'([A-Z])([-+]?[0-9]*\.?[0-9]+)')
 
+# Parenthesis-style comment: (...)
+COMMENT_RE = re.compile(r'\(.*?\)')
+
 
 def parse_gcode_line(line):
     """
@@ -26,10 +29,12 @@ def parse_gcode_line(line):
     """
 
     # Remove semicolon comments
-    line = line.split(';')[0]
+    line = line.partition(';')[0]
 
-    # Remove parenthesis-style comments
-    line = re.sub(r'\(.*?\)', '', line)
+    # Remove parenthesis-style comments (most lines have none, so the
+    # substitution is skipped unless there is an opening paren)
+    if '(' in line:
+        line = COMMENT_RE.sub('', line)
 
     # Normalize whitespace and case
     line = line.strip().upper()
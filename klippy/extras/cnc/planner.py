@@ -1,16 +1,15 @@
 # klippy/extras/cnc/planner.py
 
 from dataclasses import dataclass
-from typing import Deque, List, Optional, Tuple
-from collections import deque
+from typing import Iterable, List, Optional, Tuple
 import math
 
-from primitives import MotionPrimitive, MotionType
+from primitives import DATACLASS_SLOTS, MotionPrimitive, MotionType
 
 EPS = 1e-12
 
 
-@dataclass
+@dataclass(**DATACLASS_SLOTS)
 class PlannedPrimitive:
     """
     Planned wrapper around a MotionPrimitive.
@@ -28,15 +27,17 @@ class PlannedPrimitive:
     t_decel: float
 
 
-@dataclass
+@dataclass(**DATACLASS_SLOTS)
 class _MoveInfo:
     p: MotionPrimitive
     L: float                    # segment length (mm)
     u: Tuple[float, float, float]  # unit direction vector
     vmax: float                 # max allowed speed on this segment (mm/s)
+    vmax2: float                # vmax^2, used by every junction and replan
     accel: float                # accel along path (mm/s^2)
     min_time: float             # optimistic time at vmax (s)
     delta_v2: float             # 2 * L * accel
+    junction_v2: float = float("inf")  # v^2 cap at the junction with the previous move
 
 
 def _clamp(x: float, lo: float, hi: float) -> float:
@@ -44,13 +45,12 @@ def _clamp(x: float, lo: float, hi: float) -> float:
 
 
 def _unit_vec(p: MotionPrimitive) -> Tuple[float, float, float]:
-    dx = p.end[0] - p.start[0]
-    dy = p.end[1] - p.start[1]
-    dz = p.end[2] - p.start[2]
-    L = math.sqrt(dx*dx + dy*dy + dz*dz)
+    L = p.length()  # cached on the primitive; same sqrt as here
     if L < EPS:
         return (0.0, 0.0, 0.0)
-    return (dx / L, dy / L, dz / L)
+    sx, sy, sz = p.start
+    ex, ey, ez = p.end
+    return ((ex - sx) / L, (ey - sy) / L, (ez - sz) / L)
 
 
 def _effective_path_accel(
@@ -67,18 +67,16 @@ def _effective_path_accel(
 
     ax, ay, az = axis_accels
     ux, uy, uz = abs(u[0]), abs(u[1]), abs(u[2])
-    candidates = []
 
-    if ux > EPS:
-        candidates.append(ax / ux)
-    if uy > EPS:
-        candidates.append(ay / uy)
-    if uz > EPS:
-        candidates.append(az / uz)
-
-    if not candidates:
+    if ux <= EPS and uy <= EPS and uz <= EPS:
         return default_accel
-    return min(candidates)
+
+    # Axes the move does not travel along impose no limit (inf sentinel),
+    # so no candidate list is needed
+    inf = float("inf")
+    return min(ax / ux if ux > EPS else inf,
+               ay / uy if uy > EPS else inf,
+               az / uz if uz > EPS else inf)
 
 
 def _junction_v2(prev: _MoveInfo, cur: _MoveInfo, jd: float, accel: float) -> float:
@@ -131,69 +129,75 @@ def _plan_window(
 
     start_v2 is the known v^2 entering moves[0].
     stop_at_end forces final boundary speed to 0.
+    moves[i].junction_v2 must hold the junction cap against moves[i - 1].
     """
     n = len(moves)
     if n == 0:
         return []
 
-    # Boundary caps (v^2) at each junction between moves
-    cap2 = [float("inf")] * (n + 1)
-
-    # Known carry-in speed cap at start
-    cap2[0] = max(0.0, start_v2)
-
-    # End condition
-    cap2[n] = 0.0 if stop_at_end else float("inf")
-
-    # Cap boundaries by per-move vmax as well
-    for i in range(n):
-        vmax2 = moves[i].vmax * moves[i].vmax
-        cap2[i] = min(cap2[i], vmax2)
-        cap2[i + 1] = min(cap2[i + 1], vmax2)
-
-    # Junction caps (between i-1 and i) go into cap2[i]
-    for i in range(1, n):
-        prev = moves[i - 1]
-        cur = moves[i]
-        a_junc = min(prev.accel, cur.accel)
-
-        v2 = _junction_v2(prev, cur, junction_deviation, a_junc)
-        v2 = min(v2, prev.vmax * prev.vmax, cur.vmax * cur.vmax)
-
-        cap2[i] = min(cap2[i], v2)
-
-    # Start with caps
-    v2b = cap2[:]
-
-    # Backward pass: ensure we can decelerate from boundary i to i+1 across move i
-    # Skip i=0: we treat cap2[0] as given carry-in cap and do not increase it.
-    for i in reversed(range(1, n)):
-        a = moves[i].accel
-        L = moves[i].L
-        reachable2 = v2b[i + 1] + 2.0 * a * L
-        v2b[i] = min(v2b[i], reachable2)
+    # Per-move values used by the backward pass, read off the move objects once
+    vmax2s = [m.vmax2 for m in moves]
+    delta_v2s = [m.delta_v2 for m in moves]  # 2 * a * L
+
+    # Boundary v^2 at each junction between moves (v2b[i] is the boundary
+    # entering move i). Caps and decel reachability are applied together in
+    # one backward sweep; _plan_prefix() then does the forward sweep.
+    inf = float("inf")
+    v2b = [0.0] * (n + 1)
+
+    # End condition, capped by the last move's vmax
+    v2b[n] = min(0.0 if stop_at_end else inf, vmax2s[n - 1])
+
+    # Backward pass: ensure we can decelerate from boundary i to i+1 across move i.
+    # Interior boundaries are first capped by the vmax of both adjacent moves
+    # and the junction cap (between i-1 and i). Junction caps only depend on
+    # the two adjacent moves, so they are computed once when a move is added
+    # (see CNCPlanner.push) rather than on every replan.
+    # Skip i=0: boundary 0 is the given carry-in cap and is not increased.
+    for i in range(n - 1, 0, -1):
+        cap2 = min(vmax2s[i - 1], vmax2s[i], moves[i].junction_v2)
+        reachable2 = v2b[i + 1] + delta_v2s[i]
+        v2b[i] = reachable2 if reachable2 < cap2 else cap2
 
     # Move 0 also must be able to decelerate to boundary 1, but we can only reduce boundary 1,
     # not increase boundary 0 beyond its cap.
-    # (Forward pass below will handle limiting boundary 1 based on boundary 0.)
+    # (Forward pass will handle limiting boundary 1 based on boundary 0.)
+    return _plan_prefix(moves, v2b, start_v2, n)
 
-    # Forward pass: ensure we can accelerate from boundary i to i+1 across move i
-    for i in range(n):
-        a = moves[i].accel
-        L = moves[i].L
-        reachable2 = v2b[i] + 2.0 * a * L
-        v2b[i + 1] = min(v2b[i + 1], reachable2)
 
-    # Build per-move trapezoids
+def _plan_prefix(
+    moves: List[_MoveInfo],
+    back_v2: List[float],
+    start_v2: float,
+    count: int,
+) -> List[PlannedPrimitive]:
+    """
+    Forward pass + trapezoids for moves[:count].
+
+    back_v2[i] (i >= 1) must hold boundary i after caps and the backward
+    pass; back_v2[0] is ignored in favour of start_v2. back_v2 is only
+    read, so a cached backward pass can be reused.
+    """
+    # Known carry-in speed cap at start, capped by move 0's vmax
+    v2 = min(max(0.0, start_v2), moves[0].vmax2)
+
     planned: List[PlannedPrimitive] = []
-    for i in range(n):
+    for i in range(count):
         m = moves[i]
         L = m.L
         a = m.accel
 
-        v_in2 = max(0.0, v2b[i])
-        v_out2 = max(0.0, v2b[i + 1])
-        vmax2 = m.vmax * m.vmax
+        # Ensure we can accelerate from boundary i to i+1 across move i;
+        # this is the last update boundary i+1 receives
+        next_v2 = back_v2[i + 1]
+        reachable2 = v2 + m.delta_v2
+        if reachable2 < next_v2:
+            next_v2 = reachable2
+
+        v_in2 = max(0.0, v2)
+        v_out2 = max(0.0, next_v2)
+        vmax2 = m.vmax2
+        v2 = next_v2
 
         # Max reachable peak v^2 with accel constraints on both ends:
         # v_peak^2 <= a*L + 0.5*(v_in^2 + v_out^2)
@@ -273,14 +277,24 @@ class CNCPlanner:
 
         self.axis_accels = axis_accels
 
-        self._window: Deque[_MoveInfo] = deque()
+        # Plain list: _plan_window() indexes it, and flushed moves are
+        # dropped from the front in one slice delete
+        self._window: List[_MoveInfo] = []
         self._window_time = 0.0  # sum(min_time) of moves in window
         self._carry_in_v2 = 0.0  # v^2 entering first move of window
+        self._last_move: Optional[_MoveInfo] = None  # most recently pushed move
+
+        # Boundary v^2 after caps + backward pass with a stop at the window
+        # end, kept in step with _window (index 0 is unused); see
+        # _extend_backward()
+        self._back_v2: List[float] = [0.0]
 
     def reset(self) -> None:
         self._window.clear()
         self._window_time = 0.0
         self._carry_in_v2 = 0.0
+        self._last_move = None
+        self._back_v2 = [0.0]
 
     def push(self, prim: MotionPrimitive) -> List[PlannedPrimitive]:
         """
@@ -290,14 +304,34 @@ class CNCPlanner:
         if mi is None:
             return []
 
+        prev = self._last_move
+        if prev is not None:
+            mi.junction_v2 = self._junction_cap2(prev, mi)
+        self._last_move = mi
+
         self._window.append(mi)
         self._window_time += mi.min_time
+        self._extend_backward(mi)
 
         # If window grows too large, force a flush (commit more aggressively)
         force = len(self._window) >= self.max_window_moves
 
         return self._flush_if_ready(force=force)
 
+    def push_batch(self, prims: Iterable[MotionPrimitive]) -> List[PlannedPrimitive]:
+        """
+        Push several raw MotionPrimitives in order. Returns everything they
+        commit, exactly as the same push() calls would, in one list.
+        """
+        committed: List[PlannedPrimitive] = []
+        extend = committed.extend
+        push = self.push
+        for prim in prims:
+            out = push(prim)
+            if out:
+                extend(out)
+        return committed
+
     def finish(self) -> List[PlannedPrimitive]:
         """
         End-of-stream: plan remaining moves and force final stop (v_exit=0).
@@ -306,7 +340,7 @@ class CNCPlanner:
             return []
 
         planned = _plan_window(
-            list(self._window),
+            self._window,
             junction_deviation=self.junction_deviation,
             start_v2=self._carry_in_v2,
             stop_at_end=True,
@@ -325,7 +359,7 @@ class CNCPlanner:
 
         # Determine segment speed limit (mm/s)
         # feedrate in your codebase is mm/min
-        if prim.motion == MotionType.RAPID:
+        if prim.motion is MotionType.RAPID:
             v_cmd = self.max_velocity
         else:
             if prim.feedrate is None or prim.feedrate <= 0.0:
@@ -344,11 +378,46 @@ class CNCPlanner:
             L=L,
             u=u,
             vmax=v_cmd,
+            vmax2=v_cmd * v_cmd,
             accel=a,
             min_time=min_time,
             delta_v2=delta_v2,
         )
 
+    def _junction_cap2(self, prev: _MoveInfo, cur: _MoveInfo) -> float:
+        """
+        v^2 cap at the junction between two consecutive moves.
+        """
+        a_junc = min(prev.accel, cur.accel)
+        v2 = _junction_v2(prev, cur, self.junction_deviation, a_junc)
+        return min(v2, prev.vmax2, cur.vmax2)
+
+    def _extend_backward(self, mi: _MoveInfo) -> None:
+        """
+        Update the cached backward pass for a move just appended to the window.
+
+        Only the stop moves: the new move gets the end boundary, and the old
+        end boundary becomes a junction. Walking back from there, each
+        boundary depends only on the one after it, so the walk stops at the
+        first boundary whose value does not change. On smooth toolpaths
+        that is within a few moves, instead of re-running the backward pass
+        over the whole window on every replan.
+        """
+        window = self._window
+        back = self._back_v2
+
+        # Stop at the end of the window, capped by the new move's vmax
+        back.append(min(0.0, mi.vmax2))
+
+        for i in range(len(window) - 1, 0, -1):
+            m = window[i]
+            cap2 = min(window[i - 1].vmax2, m.vmax2, m.junction_v2)
+            reachable2 = back[i + 1] + m.delta_v2
+            v2 = reachable2 if reachable2 < cap2 else cap2
+            if v2 == back[i]:
+                break
+            back[i] = v2
+
     def _flush_if_ready(self, *, force: bool) -> List[PlannedPrimitive]:
         """
         Decide whether to plan+commit a prefix of the window.
@@ -368,16 +437,6 @@ class CNCPlanner:
         if not force and self._window_time < self.buffer_time:
             return []
 
-        # Plan the full current window (force a stop at end of *window*)
-        # The intent is: keep enough tail so that the forced stop lives in the tail and doesn't
-        # pollute earlier motion.
-        planned_all = _plan_window(
-            list(self._window),
-            junction_deviation=self.junction_deviation,
-            start_v2=self._carry_in_v2,
-            stop_at_end=True,
-        )
-
         # Choose how many moves to commit:
         # Commit from the front until remaining_time <= buffer_time,
         # BUT always keep at least keep_tail_moves uncommitted.
@@ -400,19 +459,24 @@ class CNCPlanner:
         if flush_count <= 0:
             return []
 
-        committed = planned_all[:flush_count]
-
-        # Update carry-in for the new head of window (if any)
-        if flush_count < len(planned_all):
-            new_head = planned_all[flush_count]
-            self._carry_in_v2 = new_head.v_entry * new_head.v_entry
-        else:
-            self._carry_in_v2 = 0.0
-
-        # Pop flushed moves from raw window and update time
-        for _ in range(flush_count):
-            mi0 = self._window.popleft()
-            self._window_time -= mi0.min_time
+        # Plan the committed prefix against the full current window (the cached
+        # backward pass forces a stop at end of *window*). The intent is: keep
+        # enough tail so that the forced stop lives in the tail and doesn't
+        # pollute earlier motion. Moves past the prefix are replanned on a
+        # later push anyway, so their forward pass is not computed here.
+        committed = _plan_prefix(
+            self._window, self._back_v2, self._carry_in_v2, flush_count)
+
+        # Carry-in for the new head of window: the boundary it shares with
+        # the last committed move (flush_count < len(window), see max_flush)
+        last = committed[-1]
+        self._carry_in_v2 = last.v_exit * last.v_exit
+
+        # Drop flushed moves from raw window and update time
+        # (remaining_time already subtracted their min_time in order)
+        del self._window[:flush_count]
+        del self._back_v2[:flush_count]
+        self._window_time = remaining_time
 
         # Numerical safety
         if self._window_time < 0.0:
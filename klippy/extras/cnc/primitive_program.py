@@ -1,61 +1,47 @@
 # klippy/extras/cnc/primitive_program.py
 
+try:
+    from .program import CNCProgram
+except ImportError:
+    from program import CNCProgram
 
-class PrimitiveProgram:
+
+class PrimitiveProgram(CNCProgram):
     """
     Simple container for a sequence of motion primitives.
 
     This class represents a precomputed CNC "program" consisting
     of MotionPrimitive objects and provides sequential access
     for execution by a controller.
+
+    It is a CNCProgram built from a sequence of primitives; storage,
+    iteration and time estimation are shared with CNCProgram.
     """
 
     def __init__(self, primitives):
-        # Ordered list of motion primitives
-        self.primitives = primitives
+        super().__init__()
 
-        # Current execution index
-        self.index = 0
-
-    def has_next(self):
-        """
-        Check whether there are remaining primitives to execute.
-        """
-        return self.index < len(self.primitives)
+        # Ordered list of motion primitives. Copied, so reset() and
+        # append() never modify the caller's list
+        self.primitives = list(primitives)
 
-    def next(self):
+    @property
+    def index(self):
         """
-        Return the next motion primitive and advance the program counter.
+        Current execution index (the CNCProgram cursor).
         """
-        p = self.primitives[self.index]
-        self.index += 1
-        return p
+        return self.cursor
 
-    def current(self):
-        """
-        Return the current execution index.
-        """
-        return self.index
-
-    def total(self):
-        """
-        Return the total number of primitives in the program.
-        """
-        return len(self.primitives)
+    @index.setter
+    def index(self, value):
+        self.cursor = value
 
     def percent_complete(self):
         """
         Return completion percentage based on primitive count.
-        """
-        if self.total() == 0:
-            return 100.0
-        return (self.index / self.total()) * 100.0
 
-    def remaining_time_seconds(self):
+        An empty program counts as complete.
         """
-        Placeholder for estimated remaining execution time.
-
-        Intended to be implemented later using executor feedback
-        or feedrate-based estimation.
-        """
-        return 0
+        if not self.primitives:
+            return 100.0
+        return super().percent_complete()
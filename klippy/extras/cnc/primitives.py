@@ -1,7 +1,11 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from enum import Enum
 from typing import Optional, Tuple
 import math
+import sys
+
+# Fixed-layout dataclasses (no per-instance __dict__) where supported
+DATACLASS_SLOTS = {"slots": True} if sys.version_info >= (3, 10) else {}
 
 
 class MotionType(Enum):
@@ -16,7 +20,7 @@ class MotionType(Enum):
     ARC_CCW = "G3"
 
 
-@dataclass
+@dataclass(**DATACLASS_SLOTS)
 class MotionPrimitive:
     """
     Represents a single, fully-resolved motion command.
@@ -38,19 +42,29 @@ class MotionPrimitive:
     # Feedrate in units per minute (None for non-feed moves)
     feedrate: Optional[float] = None
 
+    # Feedrate converted to units per second (feedrate / 60), filled in
+    # once per G-code line by the interpreter; None if not precomputed.
+    # Derived from feedrate only: not part of equality or repr, and must
+    # be passed as None (or recomputed) when replacing feedrate.
+    speed: Optional[float] = field(default=None, compare=False, repr=False)
+
+    # Cached Euclidean length (computed on first length() call)
+    _length: Optional[float] = field(
+        default=None, init=False, repr=False, compare=False)
+
     def length(self):
         """
         Compute the Euclidean length of the motion primitive.
 
         Used for:
+        - Planning
         - Progress tracking
         - Time estimation
-        """
-        x0, y0, z0 = self.start
-        x1, y1, z1 = self.end
-
-        dx = x1 - x0
-        dy = y1 - y0
-        dz = z1 - z0
 
-        return math.sqrt(dx*dx + dy*dy + dz*dz)
+        The result is cached; primitives are not modified after creation.
+        """
+        length = self._length
+        if length is None:
+            # One C call for the whole 3D distance
+            length = self._length = math.dist(self.start, self.end)
+        return length
@@ -1,5 +1,7 @@
 # klippy/extras/cnc/program.py
 
+from itertools import accumulate, islice
+
 
 class CNCProgram:
     """
@@ -18,6 +20,10 @@ class CNCProgram:
         # Current execution index
         self.cursor = 0
 
+        # Cumulative estimated time: _cum_time[i] is the time of
+        # primitives[:i]. Extended lazily by _cumulative_time().
+        self._cum_time = [0.0]
+
     def load_primitives(self, primitives):
         """
         Append a list of motion primitives to the program.
@@ -38,12 +44,26 @@ class CNCProgram:
         self.cursor += 1
         return p
 
+    def __iter__(self):
+        """
+        Iterate over the remaining primitives.
+
+        Equivalent to calling next() while has_next(): the cursor is
+        advanced as each primitive is handed out, so progress queries
+        stay valid mid-iteration.
+        """
+        start = self.cursor
+        for cursor, p in enumerate(islice(self.primitives, start, None), start + 1):
+            self.cursor = cursor
+            yield p
+
     def reset(self):
         """
         Clear the program and reset execution state.
         """
         self.primitives.clear()
         self.cursor = 0
+        self._cum_time = [0.0]
 
     # ---- progress helpers ----
 
@@ -74,18 +94,44 @@ class CNCProgram:
         Time is estimated by summing length / feedrate
         for all primitives that have a valid feedrate.
         """
-        total = 0.0
-        for p in self.primitives:
-            if p.feedrate and p.feedrate > 0:
-                total += p.length() / (p.feedrate / 60.0)
-        return total
+        return self._cumulative_time()[-1]
 
     def remaining_time_seconds(self):
         """
         Estimate remaining execution time from the current cursor position.
         """
-        remaining = 0.0
-        for p in self.primitives[self.cursor:]:
-            if p.feedrate and p.feedrate > 0:
-                remaining += p.length() / (p.feedrate / 60.0)
-        return remaining
+        cum = self._cumulative_time()
+        return cum[-1] - cum[min(self.cursor, len(cum) - 1)]
+
+    def _cumulative_time(self):
+        """
+        Return the cumulative time table, covering any primitives
+        appended since the last call. Time queries are then O(1)
+        instead of a scan of the program.
+        """
+        cum = self._cum_time
+        done = len(cum) - 1
+        count = len(self.primitives)
+        if done > count:
+            # Primitives were removed behind our back: start over
+            cum = self._cum_time = [0.0]
+            done = 0
+        if done < count:
+            durations = map(_duration, islice(self.primitives, done, None))
+            cum.extend(islice(accumulate(durations, initial=cum[-1]), 1, None))
+        return cum
+
+
+def _duration(p):
+    """
+    Estimated time (s) of one primitive: length / feedrate, or 0.0
+    without a valid feedrate.
+    """
+    feedrate = p.feedrate
+    if feedrate and feedrate > 0:
+        # Interpreter-built primitives carry feedrate / 60 precomputed
+        speed = p.speed
+        if speed is None:
+            speed = feedrate / 60.0
+        return p.length() / speed
+    return 0.0
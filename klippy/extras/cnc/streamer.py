@@ -1,5 +1,30 @@
 # klippy/extras/cnc/streamer.py
 
+import io
+import os
+
+# Read-ahead buffer for G-code files (large files are read sequentially)
+READ_BUFFER_SIZE = 1 << 20
+
+# First characters of a comment-only line (; comment or (comment));
+# tested with one `in` on the first character of each stripped line
+COMMENT_START = ";("
+
+
+def advise_sequential(fd):
+    """
+    Tell the kernel a G-code file will be read once, front to back,
+    so it can read ahead aggressively. Advisory only: silently
+    ignored where posix_fadvise is unavailable or unsupported.
+    """
+    fadvise = getattr(os, "posix_fadvise", None)
+    if fadvise is not None:
+        try:
+            fadvise(fd, 0, 0, os.POSIX_FADV_SEQUENTIAL)
+        except OSError:
+            # e.g. not supported on pipes
+            pass
+
 
 class GCodeStreamer:
     """
@@ -23,6 +48,40 @@ class GCodeStreamer:
         # End-of-file flag
         self.eof = False
 
+        # File position at close() and the line number it belongs to,
+        # so open() can resume with a seek instead of re-reading lines
+        self._resume_offset = None
+        self._resume_line = None
+
+    @classmethod
+    def from_fd(cls, fd, filepath):
+        """
+        Create a streamer around an already opened file descriptor.
+
+        Lets callers open the file once (and report a missing file
+        themselves) instead of checking existence and opening again.
+        The kernel is advised that the file will be read sequentially.
+        """
+        advise_sequential(fd)
+
+        streamer = cls(filepath)
+        streamer.file = os.fdopen(fd, "r", buffering=READ_BUFFER_SIZE)
+        return streamer
+
+    @classmethod
+    def from_iterable(cls, lines, filepath="<memory>"):
+        """
+        Create a streamer over G-code lines held in memory.
+
+        Lines are given without line endings. The result streams
+        exactly like a file with the same contents, without touching
+        the filesystem (handy for tests and generated programs). There
+        is no file to reopen, so it cannot be resumed after close().
+        """
+        streamer = cls(filepath)
+        streamer.file = io.StringIO("".join(line + "\n" for line in lines))
+        return streamer
+
     def open(self):
         """
         Open the G-code file for streaming.
@@ -31,17 +90,29 @@ class GCodeStreamer:
         forward to the last processed line.
         """
         if self.file is None:
-            self.file = open(self.filepath, "r")
+            self.file = open(self.filepath, "r", buffering=READ_BUFFER_SIZE)
+            advise_sequential(self.file.fileno())
 
             # Skip lines that were already processed
-            for _ in range(self.line_number):
-                self.file.readline()
+            if (self._resume_offset is not None
+                    and self._resume_line == self.line_number):
+                self.file.seek(self._resume_offset)
+            else:
+                readline = self.file.readline
+                for _ in range(self.line_number):
+                    readline()
 
     def close(self):
         """
         Close the G-code file if it is open.
         """
         if self.file:
+            try:
+                self._resume_offset = self.file.tell()
+                self._resume_line = self.line_number
+            except (OSError, ValueError):
+                # Not seekable (e.g. a pipe): resume by skipping lines
+                self._resume_offset = None
             self.file.close()
             self.file = None
 
@@ -49,28 +120,46 @@ class GCodeStreamer:
         """
         Return the next executable G-code line.
 
+        Same as next_lines(1), unwrapped. Returns None when
+        end-of-file is reached.
+        """
+        lines = self.next_lines(1)
+        return lines[0] if lines else None
+
+    def next_lines(self, count):
+        """
+        Return up to count executable G-code lines in one call.
+
         Skips:
         - Blank lines
         - Full-line comments
 
-        Returns None when end-of-file is reached.
+        Fewer than count lines are returned only at end-of-file.
         """
+        lines = []
         if self.eof or not self.file:
-            return None
+            return lines
 
-        while True:
-            line = self.file.readline()
+        readline = self.file.readline
+        append = lines.append
+        line_number = self.line_number
+
+        while len(lines) < count:
+            line = readline()
 
             if not line:
                 # End of file reached
                 self.eof = True
-                return None
+                break
 
-            self.line_number += 1
+            line_number += 1
             line = line.strip()
 
             # Skip blank lines and comment-only lines
-            if not line or line.startswith(";") or line.startswith("("):
+            if not line or line[0] in COMMENT_START:
                 continue
 
-            return line
+            append(line)
+
+        self.line_number = line_number
+        return lines
@@ -12,6 +12,7 @@ import sys
 import argparse
 import tempfile
 import math
+import logging
 from collections import Counter
 
 # Ensure local (non-package) imports inside klippy/extras/cnc work
@@ -249,4 +250,6 @@ def main():
 
 
 if __name__ == "__main__":
+    # Controller state and progress messages go through logging
+    logging.basicConfig(level=logging.INFO)
     main()
\ No newline at end of file
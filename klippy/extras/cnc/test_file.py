@@ -6,6 +6,11 @@ from limits import SoftLimits
 from mock_executor import MockMotionExecutor
 from controller import CNCController
 from parser import parse_gcode_line
+from itertools import islice
+import logging
+
+# Lines parsed + interpreted per batch during the prescan
+PRESCAN_CHUNK_LINES = 256
 
 
 # -------------------------
@@ -20,6 +25,7 @@ def prescan_total_length(
     from modal_state import CNCModalState
     from interpreter import CNCInterpreter
     from parser import parse_gcode_line
+    from primitives import MotionPrimitive
 
     # Fresh, isolated modal state
     state = CNCModalState()
@@ -29,16 +35,22 @@ def prescan_total_length(
     interpreter = CNCInterpreter(state, soft_limits=None)
 
     loader = GCodeFileLoader(filepath)
-    lines = loader.load()
 
     total_length = 0.0
 
-    for line in lines:
-        parsed = parse_gcode_line(line)
-        primitives = interpreter.interpret(parsed)
+    # Lines are parsed and interpreted a chunk at a time (one
+    # interpret_batch() call per chunk), and lengths are summed in C
+    # (sum over map); only one chunk of primitives is held at a time
+    interpret_batch = interpreter.interpret_batch
+    length = MotionPrimitive.length
+    lines = iter(loader)
 
-        for p in primitives:
-            total_length += p.length()
+    while True:
+        chunk = list(islice(lines, PRESCAN_CHUNK_LINES))
+        if not chunk:
+            break
+        prims = interpret_batch(map(parse_gcode_line, chunk))
+        total_length += sum(map(length, prims))
 
     return total_length
 
@@ -48,34 +60,41 @@ def prescan_total_length(
 # Setup
 # -------------------------
 
-limits = SoftLimits({
-    "X": (-1000.0, 1000.0),
-    "Y": (-1000.0, 1000.0),
-    "Z": (-1000.0, 1000.0),
-})
+def main():
+    limits = SoftLimits({
+        "X": (-1000.0, 1000.0),
+        "Y": (-1000.0, 1000.0),
+        "Z": (-1000.0, 1000.0),
+    })
+
+    # --- Prescan state (isolated) ---
+    prescan_state = CNCModalState()
+    prescan_state.arc_tolerance = 0.01  # or whatever you want
 
-# --- Prescan state (isolated) ---
-prescan_state = CNCModalState()
-prescan_state.arc_tolerance = 0.01  # or whatever you want
+    total_length = prescan_total_length(
+        filepath="test.nc",
+        arc_tolerance=prescan_state.arc_tolerance,
+    )
+
+    # --- Runtime state ---
+    state = CNCModalState()
+    state.arc_tolerance = prescan_state.arc_tolerance
 
-total_length = prescan_total_length(
-    filepath="test.nc",
-    arc_tolerance=prescan_state.arc_tolerance,
-)
+    interp = CNCInterpreter(state, soft_limits=limits)
 
-# --- Runtime state ---
-state = CNCModalState()
-state.arc_tolerance = prescan_state.arc_tolerance
+    executor = MockMotionExecutor()
+    controller = CNCController(executor, program=None)
+    controller.set_total_length(total_length)
 
-interp = CNCInterpreter(state, soft_limits=limits)
+    from streamer import GCodeStreamer
+    streamer = GCodeStreamer("test.nc")
 
-executor = MockMotionExecutor()
-controller = CNCController(executor, program=None)
-controller.set_total_length(total_length)
+    controller.start()
+    controller.run_stream(streamer, interp)
+    controller.flush()
 
-from streamer import GCodeStreamer
-streamer = GCodeStreamer("test.nc")
 
-controller.start()
-controller.run_stream(streamer, interp)
-controller.flush()
+if __name__ == "__main__":
+    # Controller state and progress messages go through logging
+    logging.basicConfig(level=logging.INFO)
+    main()
@@ -10,7 +10,9 @@ import os
 import sys
 import math
 import tempfile
+from collections import deque
 from dataclasses import dataclass
+from operator import attrgetter
 
 # Ensure local (non-package) imports inside klippy/extras/cnc work
 THIS_DIR = os.path.dirname(os.path.abspath(__file__))
@@ -19,6 +21,7 @@ sys.path.insert(0, THIS_DIR)
 from primitives import MotionPrimitive, MotionType
 from planner import CNCPlanner
 from controller import CNCController
+from klipper_executor import KlipperMotionExecutor
 from streamer import GCodeStreamer
 
 
@@ -42,12 +45,12 @@ def clamp(x, lo, hi):
 # Expected JD math (matches planner.py)
 # -------------------------
 
-def expected_junction_speed(u1, u2, jd_mm, accel_mm_s2, L1, L2, vmax):
+def expected_junction_speed_sq(u1, u2, jd_mm, accel_mm_s2, L1, L2, vmax):
     """
     Compute expected junction speed cap for 2 connected segments using the same
     Klipper-style JD model implemented in planner.py.
 
-    Returns v_junc (mm/s).
+    Returns v_junc^2 (mm^2/s^2); tests compare it against v_exit**2.
     """
     dot = clamp(u1[0]*u2[0] + u1[1]*u2[1] + u1[2]*u2[2], -1.0, 1.0)
     junction_cos_theta = -dot
@@ -56,19 +59,17 @@ def expected_junction_speed(u1, u2, jd_mm, accel_mm_s2, L1, L2, vmax):
 
     one_minus_sin = 1.0 - sin_theta_d2
     if one_minus_sin <= 1e-12 or cos_theta_d2 <= 1e-12:
-        return vmax
+        return vmax*vmax
 
     R = sin_theta_d2 / one_minus_sin
     v2_jd = accel_mm_s2 * (jd_mm * R)
 
+    # Centripetal cap: the shorter segment binds
     quarter_tan = 0.25 * sin_theta_d2 / cos_theta_d2
-    delta_v2_1 = 2.0 * L1 * accel_mm_s2
-    delta_v2_2 = 2.0 * L2 * accel_mm_s2
-    v2_cent_1 = delta_v2_1 * quarter_tan
-    v2_cent_2 = delta_v2_2 * quarter_tan
+    v2_cent = 2.0 * min(L1, L2) * accel_mm_s2 * quarter_tan
 
-    v2 = min(v2_jd, v2_cent_1, v2_cent_2, vmax*vmax)
-    return math.sqrt(max(0.0, v2))
+    v2 = min(v2_jd, v2_cent, vmax*vmax)
+    return max(0.0, v2)
 
 
 # -------------------------
@@ -84,35 +85,36 @@ def make_linear(x0, y0, z0, x1, y1, z1, feed_mm_min):
     )
 
 def unit_vec(p):
-    dx = p.end[0] - p.start[0]
-    dy = p.end[1] - p.start[1]
-    dz = p.end[2] - p.start[2]
-    L = math.sqrt(dx*dx + dy*dy + dz*dz)
+    # Length is cached on the primitive and shared with the planner
+    L = p.length()
     if L < 1e-12:
         return (0.0, 0.0, 0.0), 0.0
-    return (dx/L, dy/L, dz/L), L
+    sx, sy, sz = p.start
+    ex, ey, ez = p.end
+    return ((ex - sx)/L, (ey - sy)/L, (ez - sz)/L), L
 
 def make_arc_polyline(center, radius, start_deg, end_deg, segments, feed_mm_min):
     """
     Build a list of linear segments approximating an arc.
     """
     cx, cy = center
-    pts = []
-    for i in range(segments + 1):
-        t = i / segments
-        ang = math.radians(start_deg + (end_deg - start_deg) * t)
-        x = cx + radius * math.cos(ang)
-        y = cy + radius * math.sin(ang)
-        pts.append((x, y, 0.0))
-    prims = []
-    for i in range(segments):
-        prims.append(MotionPrimitive(
+    start_rad = math.radians(start_deg)
+    step_rad = math.radians(end_deg - start_deg) / segments
+    cos = math.cos
+    sin = math.sin
+    pts = [
+        (cx + radius * cos(ang), cy + radius * sin(ang), 0.0)
+        for ang in (start_rad + step_rad * i for i in range(segments + 1))
+    ]
+    return [
+        MotionPrimitive(
             motion=MotionType.LINEAR,
-            start=pts[i],
-            end=pts[i+1],
+            start=p0,
+            end=p1,
             feedrate=feed_mm_min,
-        ))
-    return prims
+        )
+        for p0, p1 in zip(pts, pts[1:])
+    ]
 
 
 # -------------------------
@@ -143,18 +145,17 @@ def test_planner_corner_jd_numeric():
         keep_tail_moves=1,
     )
 
-    out = []
-    out.extend(planner.push(p1))
-    out.extend(planner.push(p2))
+    out = planner.push_batch((p1, p2))
     out.extend(planner.finish())
     assert_true(len(out) == 2, f"Expected 2 planned moves, got {len(out)}")
 
-    v_junc_expected = expected_junction_speed(u1, u2, jd, accel, L1, L2, vmax=min(vmax, feed_mm_min/60.0))
-    v_junc_planned = out[0].v_exit
+    v2_junc_expected = expected_junction_speed_sq(u1, u2, jd, accel, L1, L2, vmax=min(vmax, feed_mm_min/60.0))
+    v2_junc_planned = out[0].v_exit ** 2
 
     # Loose tolerance because floating math, and planner can also be influenced by stop_at_end
-    assert_almost(v_junc_planned, v_junc_expected, tol=0.25,
-                  msg=f"Corner JD junction speed mismatch: planned={v_junc_planned:.3f}, expected~{v_junc_expected:.3f}")
+    # (5.5 mm^2/s^2 is about 0.25 mm/s at ~11 mm/s)
+    assert_almost(v2_junc_planned, v2_junc_expected, tol=5.5,
+                  msg=f"Corner JD junction speed mismatch: planned v^2={v2_junc_planned:.3f}, expected~{v2_junc_expected:.3f}")
 
 def test_planner_arc_segments_stay_fast():
     """
@@ -180,9 +181,7 @@ def test_planner_arc_segments_stay_fast():
         keep_tail_moves=1,
     )
 
-    planned = []
-    for p in prims:
-        planned.extend(planner.push(p))
+    planned = planner.push_batch(prims)
     planned.extend(planner.finish())
 
     assert_true(len(planned) == len(prims), "Planned count mismatch")
@@ -191,9 +190,9 @@ def test_planner_arc_segments_stay_fast():
     mid = planned[5:-5]
     assert_true(len(mid) > 0, "Not enough segments for mid-window check")
 
-    min_mid_exit = min(pp.v_exit for pp in mid)
-    # Expect most junctions allow ~full feedrate
-    assert_true(min_mid_exit > 0.90 * feed,
+    min_mid_exit = min(map(attrgetter("v_exit"), mid))
+    # Expect most junctions allow ~full feedrate (compared in v^2, like the JD caps)
+    assert_true(min_mid_exit ** 2 > (0.90 * feed) ** 2,
                 f"Arc segment junction speeds sag too much: min_mid_exit={min_mid_exit:.3f} mm/s, feed={feed:.3f} mm/s")
 
 
@@ -209,13 +208,16 @@ class RecordingPlanner(CNCPlanner):
 
     def push(self, prim):
         out = super().push(prim)
-        self.committed.extend(out)
+        if out:
+            # Most pushes commit nothing
+            self.committed += out
         return out
 
     def finish(self):
         out = super().finish()
         self.finish_called += 1
-        self.committed.extend(out)
+        if out:
+            self.committed += out
         return out
 
 
@@ -237,16 +239,15 @@ class FakeInterpreter:
     ignore parsed gcode; return pre-canned primitives per line
     """
     def __init__(self, per_line_prims):
-        self.per_line_prims = list(per_line_prims)
-        self.i = 0
+        # Consumed from the front, one entry per interpreted line
+        self.per_line_prims = deque(per_line_prims)
 
     def interpret(self, parsed):
         if parsed is None:
             return []
-        if self.i >= len(self.per_line_prims):
+        if not self.per_line_prims:
             return []
-        prims = self.per_line_prims[self.i]
-        self.i += 1
+        prims = self.per_line_prims.popleft()
         return prims
 
 def test_controller_run_stream_planned():
@@ -262,15 +263,8 @@ def test_controller_run_stream_planned():
         [make_linear(50, 50, 0, 100, 50, 0, feed_mm_min)],
     ]
 
-    # Create a temp gcode file with 3 non-empty lines (parser expects something)
-    fd, path = tempfile.mkstemp(prefix="jd_", suffix=".nc", text=True)
-    os.close(fd)
-    with open(path, "w") as f:
-        f.write("G1 X1\n")
-        f.write("G1 X2\n")
-        f.write("G1 X3\n")
-
-    streamer = GCodeStreamer(path)
+    # Stream 3 non-empty lines from memory (parser expects something)
+    streamer = GCodeStreamer.from_iterable(["G1 X1", "G1 X2", "G1 X3"])
     interp = FakeInterpreter(prims)
 
     planner = CNCPlanner(
@@ -295,7 +289,6 @@ def test_controller_run_stream_planned():
     assert_true(len(execu.executed) == 3, f"Expected 3 executed primitives, got {len(execu.executed)}")
     assert_almost(ctrl.completed_length, total_len, tol=1e-6, msg="Controller completed_length mismatch")
     assert_true(ctrl.eof is True, "Controller should hit EOF")
-    os.remove(path)
 
 
 # -------------------------
@@ -362,7 +355,8 @@ def test_cnc_mode_smoke():
     CURRENT REPO STATUS: cnc_mode.py still references self.program / CNCProgram,
     so this test will FAIL until you update cnc_mode to streaming.
     """
-    # Create a temp gcode file
+    # Create a temp gcode file: CNC_START FILE= opens a real path, so the
+    # in-memory streamer (GCodeStreamer.from_iterable) does not apply here
     fd, path = tempfile.mkstemp(prefix="jd_mode_", suffix=".nc", text=True)
     os.close(fd)
     with open(path, "w") as f:
@@ -425,21 +419,22 @@ def test_cnc_mode_smoke():
     pp1 = rec.committed[1]
 
     # For a 90° corner, the short-segment cap from your planner math is:
-    # v^2 = (2*L*a)*0.25  => v = sqrt(0.5*L*a)
+    # v^2 = (2*L*a)*0.25 = 0.5*L*a
     L0 = pp0.primitive.length()
     a0 = pp0.accel
-    v_short = math.sqrt(0.5 * L0 * a0)
+    v2_short = 0.5 * L0 * a0
 
     # Also compute the JD cap (using your helper) and take the minimum
     u1, L1 = unit_vec(pp0.primitive)
     u2, L2 = unit_vec(pp1.primitive)
     feed = 3000.0 / 60.0
     vmax = min(rec.max_velocity, feed)
-    v_jd = expected_junction_speed(u1, u2, rec.junction_deviation, a0, L1, L2, vmax)
+    v2_jd = expected_junction_speed_sq(u1, u2, rec.junction_deviation, a0, L1, L2, vmax)
 
-    expected = min(v_short, v_jd)
-    assert_almost(pp0.v_exit, expected, tol=0.30,
-                  msg=f"Expected corner v_exit≈{expected:.3f} (short={v_short:.3f}, jd={v_jd:.3f}), got {pp0.v_exit:.3f}")
+    # Compare in v^2; a 0.30 mm/s tolerance on v is about 2*v*0.30 on v^2
+    expected = min(v2_short, v2_jd)
+    assert_almost(pp0.v_exit ** 2, expected, tol=0.60 * math.sqrt(expected),
+                  msg=f"Expected corner v_exit^2≈{expected:.3f} (short={v2_short:.3f}, jd={v2_jd:.3f}), got {pp0.v_exit ** 2:.3f}")
 
     toolhead = printer.lookup_object("toolhead")
     assert_true(len(toolhead.moves) == 2, f"Expected 2 toolhead moves, got {len(toolhead.moves)}")
@@ -477,13 +472,11 @@ def test_planner_near_straight_keeps_speed():
         keep_tail_moves=1,
     )
 
-    out = []
-    out.extend(planner.push(p1))
-    out.extend(planner.push(p2))
+    out = planner.push_batch((p1, p2))
     out.extend(planner.finish())
     assert_true(len(out) == 2, f"Expected 2 planned moves, got {len(out)}")
 
-    v_expected = expected_junction_speed(u1, u2, jd, accel, L1, L2, vmax=min(vmax, feed))
+    v2_expected = expected_junction_speed_sq(u1, u2, jd, accel, L1, L2, vmax=min(vmax, feed))
     v_planned = out[0].v_exit
 
     # Should be very close to full feed for such a tiny angle.
@@ -491,8 +484,9 @@ def test_planner_near_straight_keeps_speed():
                 f"Near-straight junction slowed too much: v_exit={v_planned:.3f} feed={feed:.3f}")
 
     # And should match the expected math fairly closely.
-    assert_almost(v_planned, v_expected, tol=0.75,
-                  msg=f"Near-straight v_exit mismatch: planned={v_planned:.3f}, expected~{v_expected:.3f}")
+    # (75 mm^2/s^2 is about 0.75 mm/s at feed)
+    assert_almost(v_planned ** 2, v2_expected, tol=75.0,
+                  msg=f"Near-straight v_exit mismatch: planned v^2={v_planned ** 2:.3f}, expected~{v2_expected:.3f}")
 
 
 def test_planner_reversal_slows_to_zero():
@@ -517,9 +511,7 @@ def test_planner_reversal_slows_to_zero():
         keep_tail_moves=1,
     )
 
-    out = []
-    out.extend(planner.push(p1))
-    out.extend(planner.push(p2))
+    out = planner.push_batch((p1, p2))
     out.extend(planner.finish())
     assert_true(len(out) == 2, f"Expected 2 planned moves, got {len(out)}")
 
@@ -528,6 +520,59 @@ def test_planner_reversal_slows_to_zero():
                 f"Expected reversal junction speed near zero, got {v_planned:.6f} mm/s")
 
 
+# -------------------------
+# KlipperMotionExecutor test
+# -------------------------
+
+class PositionToolhead(FakeToolhead):
+    """
+    FakeToolhead that tracks its commanded position like Klipper's toolhead
+    (4 axes plus one extra axis), so outside position changes can be simulated.
+    """
+    def __init__(self):
+        super().__init__()
+        self.position = [0.0, 0.0, 0.0, 0.0, 0.0]
+    def get_position(self):
+        return list(self.position)
+    def move(self, pos, speed):
+        super().move(pos, speed)
+        self.position = list(pos)
+
+def test_klipper_executor_follows_position():
+    """
+    E and extra-axis coordinates must follow position changes made outside
+    CNC motion (e.g. G92 E / homing) between execute() and execute_batch() calls.
+    """
+    feed_mm_min = 600.0
+    printer = FakePrinter()
+    toolhead = PositionToolhead()
+    printer._objs["toolhead"] = toolhead
+    execu = KlipperMotionExecutor(printer)
+
+    execu.execute(make_linear(0, 0, 0, 10, 0, 0, feed_mm_min))
+    assert_true(toolhead.moves[-1][0] == (10.0, 0.0, 0.0, 0.0, 0.0),
+                f"Unexpected first move target: {toolhead.moves[-1][0]}")
+
+    # Outside change (G92 E5 + extra axis moved) between execute() calls
+    toolhead.position[3] = 5.0
+    toolhead.position[4] = 2.0
+    execu.execute(make_linear(10, 0, 0, 10, 10, 0, feed_mm_min))
+    assert_true(toolhead.moves[-1][0] == (10.0, 10.0, 0.0, 5.0, 2.0),
+                f"execute() used a stale E/extra tail: {toolhead.moves[-1][0]}")
+
+    # Another change, then a batch
+    toolhead.position[3] = 7.0
+    execu.execute_batch([
+        make_linear(10, 10, 0, 0, 10, 0, feed_mm_min),
+        make_linear(0, 10, 0, 0, 0, -1, feed_mm_min),
+    ])
+    assert_true(toolhead.moves[-2][0] == (0.0, 10.0, 0.0, 7.0, 2.0),
+                f"execute_batch() used a stale E/extra tail: {toolhead.moves[-2][0]}")
+    assert_true(toolhead.moves[-1][0] == (0.0, 0.0, -1.0, 7.0, 2.0),
+                f"Unexpected last batch target: {toolhead.moves[-1][0]}")
+    assert_almost(toolhead.moves[-1][1], feed_mm_min / 60.0, msg="Batch speed mismatch")
+
+
 # -------------------------
 # Main runner
 # -------------------------
@@ -539,6 +584,7 @@ def main():
         ("planner near-straight keeps speed", test_planner_near_straight_keeps_speed),
         ("planner reversal slows to zero", test_planner_reversal_slows_to_zero),
         ("controller run_stream planned", test_controller_run_stream_planned),
+        ("klipper executor follows position", test_klipper_executor_follows_position),
         ("cnc_mode smoke", test_cnc_mode_smoke),
     ]
 
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+# klippy/extras/cnc/test_limits.py
+#
+# Run from repo root:
+#   python3 klippy/extras/cnc/test_limits.py
+#
+# Ad-hoc functional tests for soft limits (no pytest dependency).
+
+import os
+import sys
+
+# Ensure local (non-package) imports inside klippy/extras/cnc work
+THIS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, THIS_DIR)
+
+from modal_state import CNCModalState
+from parser import parse_gcode_line
+from interpreter import CNCInterpreter
+from limits import SoftLimits, SoftLimitError
+
+
+# -------------------------
+# Helpers
+# -------------------------
+
+def assert_true(cond, msg):
+    if not cond:
+        raise AssertionError(msg)
+
+def make_interpreter(limits):
+    """
+    Interpreter in G21/G90 with F600, positioned at X10 Y50.
+    """
+    interp = CNCInterpreter(CNCModalState(), soft_limits=SoftLimits(limits))
+    for line in ("G21", "G90", "F600", "G1 X10 Y50"):
+        interp.interpret(parse_gcode_line(line))
+    return interp
+
+# Half circle CW from X10 Y50 to X30 Y50 around X20 Y50:
+# both endpoints sit at Y50, the arc bulges up to Y60 in between.
+ARC = "G2 X30 Y50 I10 J0"
+
+
+# -------------------------
+# Tests
+# -------------------------
+
+def test_arc_in_bounds():
+    """
+    An arc that stays inside the limits produces its segments without error.
+    """
+    interp = make_interpreter({"X": (0.0, 100.0), "Y": (0.0, 100.0)})
+    prims = interp.interpret(parse_gcode_line(ARC))
+    assert_true(len(prims) > 1, f"Expected a segmented arc, got {len(prims)} primitive(s)")
+    top = max(p.end[1] for p in prims)
+    assert_true(top > 59.0, f"Arc should bulge to ~Y60, max Y was {top:.3f}")
+
+def test_arc_bulge_exceeds_limits():
+    """
+    Both arc endpoints are inside the limits, but the segments in between
+    are not: the arc is rejected (only the end point used to be checked).
+    """
+    limits = {"X": (0.0, 100.0), "Y": (0.0, 55.0)}
+    SoftLimits(limits).check_point((30.0, 50.0, 0.0))  # end point alone is fine
+
+    interp = make_interpreter(limits)
+    try:
+        interp.interpret(parse_gcode_line(ARC))
+    except SoftLimitError as e:
+        msg = str(e)
+    else:
+        raise AssertionError("Arc bulging past Y55 should raise SoftLimitError")
+
+    assert_true(msg.startswith("Y-axis soft limit exceeded: "),
+                f"Unexpected error text: {msg}")
+    assert_true(msg.endswith("(limits 0.0 to 55.0)"), f"Unexpected error text: {msg}")
+
+def test_check_points_error_text():
+    """
+    check_points() passes in-bounds batches (fast path) and, when out of
+    bounds, reports the first offending point and axis (slow path).
+    """
+    limits = SoftLimits({"X": (0.0, 100.0), "Y": (0.0, 100.0)})
+
+    # Fast path: empty batch, in-bounds batch, unlimited Z
+    limits.check_points([])
+    limits.check_points([(0.0, 0.0, -500.0), (100.0, 100.0, 500.0), (50.0, 25.0, 0.0)])
+
+    try:
+        limits.check_points([(1.0, 1.0, 0.0), (5.0, 120.0, 0.0), (-3.0, 0.0, 0.0)])
+    except SoftLimitError as e:
+        msg = str(e)
+    else:
+        raise AssertionError("Out-of-bounds batch should raise SoftLimitError")
+
+    expected = "Y-axis soft limit exceeded: 120.000 (limits 0.0 to 100.0)"
+    assert_true(msg == expected, f"Expected {expected!r}, got {msg!r}")
+
+
+# -------------------------
+# Main runner
+# -------------------------
+
+def main():
+    tests = [
+        ("arc in bounds", test_arc_in_bounds),
+        ("arc bulge exceeds limits", test_arc_bulge_exceeds_limits),
+        ("check_points error text", test_check_points_error_text),
+    ]
+
+    failed = 0
+    for name, fn in tests:
+        try:
+            fn()
+            print(f"[PASS] {name}")
+        except Exception as e:
+            failed += 1
+            print(f"[FAIL] {name}: {e}")
+
+    if failed:
+        print(f"\n{failed} test(s) failed.")
+        sys.exit(1)
+
+    print("\nAll tests passed.")
+    sys.exit(0)
+
+if __name__ == "__main__":
+    main()
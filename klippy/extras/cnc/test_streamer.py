@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+# klippy/extras/cnc/test_streamer.py
+#
+# Run from repo root:
+#   python3 klippy/extras/cnc/test_streamer.py
+#
+# Ad-hoc functional tests for GCodeStreamer (no pytest dependency).
+
+import os
+import sys
+import tempfile
+
+# Ensure local (non-package) imports inside klippy/extras/cnc work
+THIS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, THIS_DIR)
+
+from streamer import GCodeStreamer
+
+
+# -------------------------
+# Helpers
+# -------------------------
+
+def assert_true(cond, msg):
+    if not cond:
+        raise AssertionError(msg)
+
+# Blank lines, both comment styles, surrounding whitespace
+LINES = [
+    "G21",
+    "",
+    "; header comment",
+    "  G90  ",
+    "(setup)",
+    "G1 X1 F600",
+    "   ",
+    "G1 X2 ; inline comments stay on the line",
+    "; trailing comment",
+    "G1 X3",
+]
+EXPECTED = ["G21", "G90", "G1 X1 F600", "G1 X2 ; inline comments stay on the line", "G1 X3"]
+
+def write_temp(lines):
+    fd, path = tempfile.mkstemp(prefix="streamer_", suffix=".nc", text=True)
+    with os.fdopen(fd, "w") as f:
+        f.write("\n".join(lines))  # no final newline
+    return path
+
+def check_batches_match_single_lines(make_streamer):
+    """
+    next_lines(n) must return what n next_line() calls return (minus the
+    None at EOF), with the same line_number and eof state after every batch,
+    for every batch size.
+    """
+    for n in range(1, len(LINES) + 3):
+        batched = make_streamer()
+        single = make_streamer()
+        batched.open()
+        single.open()
+
+        got = []
+        while True:
+            batch = batched.next_lines(n)
+            one_by_one = [line for line in (single.next_line() for _ in range(n))
+                          if line is not None]
+            assert_true(batch == one_by_one,
+                        f"n={n}: next_lines gave {batch}, next_line gave {one_by_one}")
+            assert_true(batched.line_number == single.line_number,
+                        f"n={n}: line_number {batched.line_number} != {single.line_number}")
+            assert_true(batched.eof == single.eof,
+                        f"n={n}: eof {batched.eof} != {single.eof}")
+            if not batch:
+                break
+            got.extend(batch)
+
+        assert_true(got == EXPECTED, f"n={n}: streamed {got}, expected {EXPECTED}")
+        assert_true(batched.eof, f"n={n}: streamer should be at EOF")
+
+        # At EOF both keep returning nothing
+        assert_true(batched.next_lines(n) == [], f"n={n}: next_lines after EOF")
+        assert_true(single.next_line() is None, f"n={n}: next_line after EOF")
+
+        batched.close()
+        single.close()
+
+
+# -------------------------
+# Tests
+# -------------------------
+
+def test_next_lines_matches_next_line_memory():
+    check_batches_match_single_lines(lambda: GCodeStreamer.from_iterable(LINES))
+
+def test_next_lines_matches_next_line_file():
+    path = write_temp(LINES)
+    try:
+        check_batches_match_single_lines(lambda: GCodeStreamer(path))
+    finally:
+        os.remove(path)
+
+
+# -------------------------
+# Main runner
+# -------------------------
+
+def main():
+    tests = [
+        ("next_lines matches next_line (memory)", test_next_lines_matches_next_line_memory),
+        ("next_lines matches next_line (file)", test_next_lines_matches_next_line_file),
+    ]
+
+    failed = 0
+    for name, fn in tests:
+        try:
+            fn()
+            print(f"[PASS] {name}")
+        except Exception as e:
+            failed += 1
+            print(f"[FAIL] {name}: {e}")
+
+    if failed:
+        print(f"\n{failed} test(s) failed.")
+        sys.exit(1)
+
+    print("\nAll tests passed.")
+    sys.exit(0)
+
+if __name__ == "__main__":
+    main()